@@ -0,0 +1,117 @@
+"""Load benchmark for the dev_tools / qa_tools MCP servers.
+
+Starts one server over stdio against a throwaway workspace and fires
+concurrent tool calls at it (file reads, listings, stat_many, plus an
+occasional slow command), then prints throughput and per-tool latency.
+With async tools a slow command no longer holds up the reads queued
+behind it, which shows up in their p95.
+
+    python bench_tools.py --server qa --calls 300 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from telemetry import percentile
+
+SWARM_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_workspace(files: int, size: int) -> str:
+    """Temp workspace with files of ~size bytes plus a slow script in dev-space/"""
+    root = tempfile.mkdtemp(prefix="swarm-bench-")
+    for space in ("dev-space/pkg", "qa-space"):
+        os.makedirs(os.path.join(root, space))
+    line = "x = 1  # padding line for the load benchmark\n"
+    for i in range(files):
+        with open(os.path.join(root, "dev-space/pkg", f"mod_{i}.py"), "w") as f:
+            f.write(line * max(1, size // len(line)))
+    with open(os.path.join(root, "dev-space/slow.py"), "w") as f:
+        f.write("import time\ntime.sleep(0.5)\nprint('done')\n")
+    return root
+
+
+def workload(server: str, files: int, slow_every: int):
+    """Yields (tool, args) forever, mixing cheap reads with an occasional slow command"""
+    n = 0
+    while True:
+        n += 1
+        if slow_every and n % slow_every == 0:
+            if server == "qa":
+                yield "run_test", {"command": "python dev-space/slow.py"}
+            else:
+                yield "execute_and_log_command", {"rawcommand": "python dev-space/slow.py",
+                                                  "logfile": "dev-space/slow.log"}
+            continue
+        path = f"dev-space/pkg/mod_{random.randrange(files)}.py"
+        yield random.choice([
+            ("read_file", {"filepath": path}),
+            ("read_file", {"filepath": path, "head": 5}),
+            ("read_files", {"filepaths": [path, f"dev-space/pkg/mod_{random.randrange(files)}.py"]}),
+            ("list_cwd_contents", {"path": "dev-space/pkg"}),
+            ("get_structure", {"directory": "dev-space"}),
+            ("stat_many", {"paths": [path]}),
+        ])
+
+
+async def bench(server: str, calls: int, concurrency: int, files: int, size: int, slow_every: int):
+    root = make_workspace(files, size)
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=[os.path.join(SWARM_ROOT, "mcps", f"{server}_tools.py")],
+        env=dict(os.environ, SWARM_WORKSPACE=root),
+        cwd=root,
+    )
+    latencies = {}
+    errors = 0
+    limit = asyncio.Semaphore(concurrency)
+    try:
+        with open(os.devnull, "w") as errlog:  # per-request server logging would swamp the output
+            async with stdio_client(params, errlog=errlog) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+
+                    async def one(tool, args):
+                        nonlocal errors
+                        async with limit:
+                            t0 = time.perf_counter()
+                            result = await session.call_tool(tool, args)
+                            latencies.setdefault(tool, []).append(time.perf_counter() - t0)
+                            errors += bool(result.isError)
+
+                    jobs = workload(server, files, slow_every)
+                    t0 = time.perf_counter()
+                    await asyncio.gather(*(one(*next(jobs)) for _ in range(calls)))
+                    wall = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"{server}_tools: {calls} calls, concurrency {concurrency}, {wall:.2f}s wall, "
+          f"{calls / wall:.1f} calls/s, {errors} errors")
+    for tool, values in sorted(latencies.items()):
+        print(f"  {tool:<24} n={len(values):<5} p50={percentile(values, 50) * 1000:8.1f}ms "
+              f"p95={percentile(values, 95) * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire concurrent tool calls at an MCP tool server")
+    parser.add_argument("--server", choices=("dev", "qa"), default="dev")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--files", type=int, default=50, help="files in the benchmark workspace")
+    parser.add_argument("--size", type=int, default=20_000, help="approximate bytes per file")
+    parser.add_argument("--slow-every", type=int, default=20, help="every Nth call is a 0.5s command (0: none)")
+    args = parser.parse_args()
+    asyncio.run(bench(args.server, args.calls, args.concurrency, args.files, args.size, args.slow_every))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Bounded conversation history for the tool-calling loops.
+
+run_dev used to append every model turn and every full tool result to
+`contents`, so each request resent all earlier file reads and test logs.
+ConversationContext keeps the same history but swaps tool outputs that are
+no longer useful for short digests:
+
+- file reads superseded by a later read/write/rm of the same path
+- command and test logs older than the most recent turns
+- and, if the estimate is still over the token budget, the oldest remaining
+  tool outputs outside the most recent turns
+"""
+import hashlib
+import json
+import logging
+import os
+from google.genai import types
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("SWARM_CONTEXT_TOKENS", "60000"))
+# Rough bytes-per-token ratio used for estimates (no network round trip to count)
+BYTES_PER_TOKEN = 4
+
+# tool name -> argument holding the file path it reads or changes
+FILE_READ_TOOLS = {"read_file": "filepath", "read_files": "filepaths"}
+# read_file arguments that make it a partial read (which never supersedes a full one)
+READ_RANGE_ARGS = ("offset", "length", "start_line", "end_line", "head", "tail")
+FILE_WRITE_TOOLS = {
+    "write_file": "filepath", "rm": "filepath", "apply_patch": "filepath", "replace_range": "filepath",
+    "write_files": "files", "rm_files": "filepaths",
+}
+LOG_TOOLS = {"run_test", "execute_and_log_command", "custom_command"}
+
+
+def touched_paths(name: str, args: dict) -> list:
+    """Normalized file paths a read/write tool call touched (batch tools touch several)"""
+    argname = FILE_READ_TOOLS.get(name) or FILE_WRITE_TOOLS.get(name)
+    value = args.get(argname) if argname else None
+    if not value:
+        return []
+    values = value if isinstance(value, list) else [value]
+    return [os.path.normpath(str(v.get("filepath") if isinstance(v, dict) else v)) for v in values]
+
+
+def estimate_tokens(n_bytes: int) -> int:
+    return n_bytes // BYTES_PER_TOKEN
+
+
+def _content_bytes(content) -> int:
+    if isinstance(content, str):
+        return len(content.encode())
+    return len(content.model_dump_json(exclude_none=True).encode())
+
+
+def payload_bytes(contents) -> int:
+    """Serialized size of a prompt string or list of contents"""
+    if isinstance(contents, str):
+        return _content_bytes(contents)
+    return sum(_content_bytes(c) for c in contents)
+
+
+def digest(name: str, args: dict, text: str, reason: str) -> str:
+    """Short stand-in for a tool result that is no longer sent in full"""
+    data = text.encode()
+    first_line = text.strip().splitlines()[0][:120] if text.strip() else ""
+    return (
+        f"[compacted {name}({json.dumps(args)[:160]}): {len(data)} bytes, "
+        f"sha1 {hashlib.sha1(data).hexdigest()[:12]}, {reason}. First line: {first_line}]"
+    )
+
+
+class ConversationContext:
+    """Conversation contents for one agent loop, kept under a token budget"""
+
+    def __init__(self, prompt=None, token_budget: int = CONTEXT_TOKEN_BUDGET, keep_recent: int = 2):
+        self.contents = []
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self._sizes = []
+        self._results = []  # one record per tool result, oldest first
+        self._turn = 0
+        if prompt is not None:
+            self.add_user_message(prompt)
+
+    def add_turn(self, model_content, calls, tool_responses):
+        """Appends a model turn and the user turn holding its function responses"""
+        self._turn += 1
+        self.contents.extend([model_content, tool_responses])
+        self._sizes.extend([_content_bytes(model_content), _content_bytes(tool_responses)])
+        index = len(self.contents) - 1
+        for part_index, call in enumerate(calls):
+            self._results.append({
+                "index": index,
+                "part": part_index,
+                "name": call.name,
+                "args": dict(call.args or {}),
+                "turn": self._turn,
+                "compacted": False,
+            })
+
+    def add_model_message(self, model_content):
+        """Appends a final (text-only) model turn so the history stays resumable"""
+        self.contents.append(model_content)
+        self._sizes.append(_content_bytes(model_content))
+
+    def add_user_message(self, text):
+        """Starts the next round of the conversation with a new user message"""
+        last = self.contents[-1] if self.contents else None
+        if isinstance(last, types.Content) and last.role == "user":
+            # Keep user/model turns alternating, e.g. after a loop hit its iteration limit
+            last.parts.append(types.Part(text=text))
+            self._sizes[-1] = _content_bytes(last)
+        else:
+            self.contents.append(text)
+            self._sizes.append(_content_bytes(text))
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes)
+
+    def _compact(self, record, reason) -> int:
+        content = self.contents[record["index"]]
+        part = content.parts[record["part"]]
+        text = str(part.function_response.response.get("result", ""))
+        summary = digest(record["name"], record["args"], text, reason)
+        record["compacted"] = True
+        if len(summary.encode()) >= len(text.encode()):
+            return 0  # a short result is already cheaper than its digest
+        content.parts[record["part"]] = types.Part(function_response=types.FunctionResponse(
+            id=part.function_response.id,
+            name=record["name"],
+            response={"result": summary}
+        ))
+        before = self._sizes[record["index"]]
+        self._sizes[record["index"]] = _content_bytes(content)
+        return before - self._sizes[record["index"]]
+
+    def compact(self) -> int:
+        """Digests stale tool outputs, then old ones while over budget. Returns bytes saved."""
+        saved = 0
+        recent = self._turn - self.keep_recent
+        latest_touch = {}
+        for position, record in enumerate(self._results):
+            if any(record["args"].get(a) for a in READ_RANGE_ARGS):
+                continue
+            for path in touched_paths(record["name"], record["args"]):
+                latest_touch[path] = position
+
+        for position, record in enumerate(self._results):
+            if record["compacted"]:
+                continue
+            paths = touched_paths(record["name"], record["args"]) if record["name"] in FILE_READ_TOOLS else []
+            # A (batch) read is stale once every file in it was read or written again later
+            if paths and all(latest_touch.get(p, position) > position for p in paths):
+                saved += self._compact(record, "superseded by a later access to the same file")
+            elif record["name"] in LOG_TOOLS and record["turn"] <= recent:
+                saved += self._compact(record, "old command output")
+
+        for record in self._results:
+            if estimate_tokens(self.total_bytes) <= self.token_budget:
+                break
+            if not record["compacted"] and record["turn"] <= recent:
+                saved += self._compact(record, "dropped to stay within the context budget")
+        return saved
+
+    def report(self, label: str = "CONTEXT"):
+        """Logs the payload size that the next request will send"""
+        total = self.total_bytes
+        logging.info(
+            f"[{label}] Sending {len(self.contents)} contents, {total} bytes "
+            f"(~{estimate_tokens(total)} tokens, budget {self.token_budget})"
+        )
+        return total
@@ -1,22 +1,37 @@
+import argparse
 import asyncio
 import os
 import sys
-import shutil
-import subprocess
+import time
+import shlex
+import queue
+from contextlib import AsyncExitStack
 from dotenv import load_dotenv
 import logging
+import logging.handlers
 import json
-from anthropic import Anthropic
-from google import genai
 from google.genai import types
 from mcp.client.stdio import stdio_client
-from mcp import ClientSession
-
-from utils import load_persona
 
+from context import ConversationContext, payload_bytes
+from llm import get_provider
+from llm_cache import CachingProvider
+from sessions import McpPool
+from telemetry import Trace, span
+from utils import load_persona, reset_workspace, format_workspace_summary
+
+# Log records go through a queue so formatting and stream writes happen on the
+# listener thread, never on the event loop between model and tool calls.
+_log_queue = queue.SimpleQueue()
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_stream)
+_log_handler = logging.handlers.QueueHandler(_log_queue)
+# The listener's handler does the real formatting; only merge args into the message here
+_log_handler.setFormatter(logging.Formatter("%(message)s"))
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s"
+    handlers=[_log_handler]
 )
 load_dotenv()
 
@@ -27,28 +42,142 @@ load_dotenv()
 CLAUDE_MODEL = "claude-opus-4-6"
 GEMINI_MODEL = "gemini-3-pro-preview"
 
+# gemini | anthropic | stub (offline, scripted via SWARM_STUB_SCRIPT)
+LLM_PROVIDER = os.environ.get("SWARM_LLM", "gemini")
+# record | replay | auto | passthrough (see llm_cache.py)
+LLM_CACHE_MODE = os.environ.get("SWARM_LLM_CACHE", "passthrough")
+LLM_CACHE_MB = int(os.environ.get("SWARM_LLM_CACHE_MB", "256"))
+
+SWARM_ROOT = os.path.dirname(os.path.abspath(__file__))
+JOBS_ROOT = os.path.join(SWARM_ROOT, "jobs")
+LLM_CACHE_DIR = os.environ.get("SWARM_LLM_CACHE_DIR", os.path.join(SWARM_ROOT, ".llm-cache"))
+
+# Only one job at a time may ask the user to approve a command
+_approval_lock = asyncio.Lock()
+
 # -------------------------------------------------------
-# QA LOOP (Gemini)
+# TOOL DISPATCH
 # -------------------------------------------------------
 
-async def run_qa(prompt, mcp_session, gemini, system_prompt):
+# Tools that only read state; consecutive calls to these run concurrently.
+# Anything else (writes, rm, arbitrary commands, test runs, since the code
+# under test can write files) runs alone, in the order the model asked for it.
+PARALLEL_SAFE_TOOLS = {"list_cwd_contents", "read_file", "read_files", "get_structure", "sys_info",
+                       "changed_since", "stat_many"}
+ALLOWED_COMMANDS = ["python"]
+
+
+def command_allowed(command) -> bool:
+    """True if the command's program is allow-listed. custom_command runs the argv list
+    without a shell, so `python x.py && rm -rf .` is python with extra arguments
+    """
+    try:
+        argv = shlex.split(command or "")
+    except ValueError:
+        return False
+    return bool(argv) and argv[0] in ALLOWED_COMMANDS
+
+
+async def run_approved_command(call, mcp_session, cwd=None, progress_callback=None):
+    """Runs a custom_command call on the tool server, asking the user first unless it is allow-listed"""
+    command = (call.args or {}).get("command")
+    if not command_allowed(command):
+        async with _approval_lock:
+            print(f"\n⚠️ Command requested (in {cwd or os.getcwd()}):\n{command}")
+            decision = (await asyncio.to_thread(input, "Approve? [y/n]: ")).strip().lower()
+        if decision != "y":
+            return "Command blocked by user."
+    result = await mcp_session.call_tool(call.name, call.args, progress_callback=progress_callback)
+    return result.content[0].text
+
+
+async def execute_call(call, mcp_session, cwd=None):
+    """Runs one function call from the model and returns the tool result text"""
+    with span("tool", tool=call.name) as s:
+        s["bytes_out"] = len(json.dumps(call.args or {}))
+
+        async def log_progress(progress, total, message):
+            logging.info(f"[{call.name}] {message or f'{progress:.0f} bytes of output'}")
+
+        if call.name == "custom_command":
+            text = await run_approved_command(call, mcp_session, cwd, log_progress)
+        else:
+            result = await mcp_session.call_tool(call.name, call.args, progress_callback=log_progress)
+            text = result.content[0].text
+        s["bytes_in"] = len(text.encode())
+    return text
+
+
+async def generate(llm, phase, contents, system_prompt, temperature, tools=None, model=None):
+    """llm.generate wrapped in a telemetry span recording payload size and token usage"""
+    with span("llm.generate", phase=phase, model=model or llm.model) as s:
+        s["bytes_out"] = payload_bytes(contents)
+        resp = await llm.generate(
+            contents=contents,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            tools=tools,
+            model=model
+        )
+        s["tokens_in"] = resp.usage.get("input_tokens")
+        s["tokens_out"] = resp.usage.get("output_tokens")
+        s["bytes_in"] = payload_bytes([resp.content]) if resp.content else 0
+    return resp
+
+
+async def dispatch_calls(calls, mcp_session, cwd=None):
+    """Executes every function call from one model turn.
+    Runs of parallel-safe calls go out together via asyncio.gather, other calls act as
+    barriers so writes keep their order. Returns (one user Content holding all function
+    responses, the list of result texts in call order).
+    """
+    results = []
+    batch = []
+
+    async def flush():
+        results.extend(await asyncio.gather(*(
+            execute_call(call, mcp_session, cwd) for call in batch
+        )))
+        batch.clear()
+
+    for call in calls:
+        if call.name in PARALLEL_SAFE_TOOLS:
+            batch.append(call)
+            continue
+        await flush()
+        results.append(await execute_call(call, mcp_session, cwd))
+    await flush()
+
+    return types.Content(role="user", parts=[
+        types.Part(function_response=types.FunctionResponse(
+            id=call.id,
+            name=call.name,
+            response={"result": text}
+        ))
+        for call, text in zip(calls, results)
+    ]), results
+
+
+# -------------------------------------------------------
+# QA LOOP (LLM)
+# -------------------------------------------------------
+
+async def run_qa(prompt, mcp_session, llm, system_prompt):
     contents = prompt
-    tool_list = await mcp_session.list_tools()
-    tools = tool_list.tools
+    tools = await mcp_session.gemini_tools()
     iteration = 0
     MAX_QA_ITERATIONS = 15
     logging.info(f"QA Started Testing....")
 
     while iteration < MAX_QA_ITERATIONS:
         iteration += 1
-        resp = gemini.models.generate_content(
-            model=GEMINI_MODEL,
+        resp = await generate(
+            llm,
+            "qa",
             contents=contents,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                temperature=0.1,
-                tools=tools
-            ),
+            system_prompt=system_prompt,
+            temperature=0.1,
+            tools=tools
         )
 
         # Check if QA has finished (looks for STATUS in response)
@@ -60,23 +189,20 @@ async def run_qa(prompt, mcp_session, gemini, system_prompt):
         if not resp.function_calls:
             return resp.text
 
-        call = resp.function_calls[0]
-        result = await mcp_session.call_tool(call.name, call.args)
-        
         if resp.text:
             logging.info(f"[QA] Response: {resp.text}")
 
-        logging.info(f"[QA] Tool: {call.name}")
-        logging.info(f"[QA] Args: {json.dumps(call.args, indent=2)}")
-        logging.info(f"[QA] Result: {result.content[0].text[:200]}")
+        tool_responses, results = await dispatch_calls(resp.function_calls, mcp_session)
+
+        for call, text in zip(resp.function_calls, results):
+            logging.info(f"[QA] Tool: {call.name}")
+            logging.info(f"[QA] Args: {json.dumps(call.args, indent=2)}")
+            logging.info(f"[QA] Result: {text[:200]}")
         
         contents = [
             prompt,
-            resp.candidates[0].content,
-            types.Part.from_function_response(
-                name=call.name,
-                response={"result": result.content[0].text}
-            )
+            resp.content,
+            tool_responses
         ]
     
     logging.warning("QA max iterations reached")
@@ -84,76 +210,57 @@ async def run_qa(prompt, mcp_session, gemini, system_prompt):
 
 
 # -------------------------------------------------------
-# DEV LOOP (Gemini)
+# DEV LOOP (LLM)
 # -------------------------------------------------------
 
-async def run_dev(prompt, mcp_session, gemini, system_prompt):
-    allowed_commands = ["python"]
-    contents = [prompt]
+async def run_dev(prompt, mcp_session, llm, system_prompt, cwd=None, context=None):
+    """Runs the developer tool loop. Pass the same context across rounds to
+    continue one conversation; the prompt is then added as the next user message.
+    """
+    if context is None:
+        context = ConversationContext(prompt)
+    else:
+        context.add_user_message(prompt)
     iteration = 0
     MAX_DEV_ITERATIONS = 20  # Safety limit
 
     while iteration < MAX_DEV_ITERATIONS:
         iteration += 1
-        logging.info(f"[ITERATION {iteration}] Sending to Gemini")
-        logging.info(f"Current contents length: {len(contents)}")
-
-        tool_list = await mcp_session.list_tools()
-
-        resp = gemini.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=contents,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                temperature=0.3,
-                tools=tool_list.tools
-            ),
+        logging.info(f"[ITERATION {iteration}] Sending to LLM")
+        saved = context.compact()
+        if saved:
+            logging.info(f"Compacted stale tool results, saved {saved} bytes")
+        context.report(f"ITERATION {iteration}")
+
+        resp = await generate(
+            llm,
+            "dev",
+            contents=context.contents,
+            system_prompt=system_prompt,
+            temperature=0.3,
+            tools=await mcp_session.gemini_tools()
         )
 
         # If no function call → we're done
         if not resp.function_calls:
             logging.info("No function call returned. Final answer reached.")
             logging.info(f"Final text: {resp.text}")
+            if resp.content:
+                context.add_model_message(resp.content)
             return resp.text
 
-        call = resp.function_calls[0]
-
-        logging.info(f"Function call detected: {call.name}")
-        logging.info(f"Arguments: {json.dumps(call.args, indent=2)}")
-
-        if call.name == "custom_command" and call.args.get("command").split(" ")[0] not in allowed_commands:
-            command = call.args.get("command")
-            print(f"\n⚠️ Command requested:\n{command}")
-            decision = input("Approve? [y/n]: ").strip().lower()
-
-            if decision != "y":
-                tool_result_text = "Command blocked by user."
-            else:
-                try:
-                    proc = subprocess.run(
-                        command,
-                        shell=True,
-                        capture_output=True,
-                        text=True
-                    )
-                    tool_result_text = proc.stdout + proc.stderr
-                    if not tool_result_text.strip():
-                        tool_result_text = "Command executed successfully."
-                except Exception as e:
-                    tool_result_text = f"Execution error: {str(e)}"
-        else:
-            result = await mcp_session.call_tool(call.name, call.args)
-            tool_result_text = result.content[0].text
+        for call in resp.function_calls:
+            logging.info(f"Function call detected: {call.name}")
+            logging.info(f"Arguments: {json.dumps(call.args, indent=2)}")
 
-        logging.info(f"Tool returned: {tool_result_text}")
+        tool_responses, results = await dispatch_calls(
+            resp.function_calls, mcp_session, cwd
+        )
 
-        contents.extend([
-            resp.candidates[0].content,
-            types.Part.from_function_response(
-                name=call.name,
-                response={"result": tool_result_text}
-            )
-        ])
+        for text in results:
+            logging.info(f"Tool returned: {text}")
+
+        context.add_turn(resp.content, resp.function_calls, tool_responses)
 
     logging.error("Max dev iterations reached. Breaking loop.")
     return "Error: Too many tool calls (possible infinite loop)."
@@ -163,64 +270,148 @@ async def run_dev(prompt, mcp_session, gemini, system_prompt):
 # SWARM ENTRY POINT (CLEANED UP)
 # -------------------------------------------------------
 
-async def make_it(user_request):
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
+def build_llm(provider=LLM_PROVIDER, cache_mode=LLM_CACHE_MODE):
+    """Creates the LLM provider selected by SWARM_LLM, behind the response cache if enabled"""
+    if provider == "gemini":
+        llm = get_provider("gemini", api_key=os.environ.get("GEMINI_API_KEY"), model=GEMINI_MODEL)
+    elif provider == "anthropic":
+        llm = get_provider("anthropic", api_key=os.environ.get("ANTHROPIC_API_KEY"), model=CLAUDE_MODEL)
+    else:
+        llm = get_provider(provider, script=os.environ.get("SWARM_STUB_SCRIPT"))
+    if cache_mode == "passthrough":
+        return llm
+    return CachingProvider(llm, LLM_CACHE_DIR, cache_mode, LLM_CACHE_MB * 2**20)
+
+
+def build_pool(size=1):
+    """Warm dev_tools/qa_tools server pairs, reused by every job leased from them"""
+    return McpPool(
+        size,
+        dev_script=os.path.join(SWARM_ROOT, "mcps/dev_tools.py"),
+        qa_script=os.path.join(SWARM_ROOT, "mcps/qa_tools.py"),
+        workspace=SWARM_ROOT
+    )
+
 
-    # --- Load API keys ---
-    claude_key = os.environ.get("ANTHROPIC_API_KEY")
-    gem_key = os.environ.get("GEMINI_API_KEY")
+async def make_it(user_request, workspace=SWARM_ROOT, llm=None, job_id=None, pool=None):
+    """Runs one request end to end, tracing every phase to <workspace>/trace.jsonl.
+    Without a pool, a single-use one is started (and stopped) for this call.
+    """
+    trace = Trace(os.path.join(workspace, "trace.jsonl"), job_id)
+    try:
+        with trace.activate(), span("make_it"):
+            async with AsyncExitStack() as stack:
+                if pool is None:
+                    with span("mcp_startup"):
+                        pool = await stack.enter_async_context(build_pool())
+                return await run_swarm(user_request, workspace, llm, job_id, pool)
+    finally:
+        trace.close()
+        print(f"\n{trace.report()}")
 
-    # --- Initialize LLM clients ---
-    claude = Anthropic(api_key=claude_key)
-    gemini = genai.Client(api_key=gem_key)
 
-    # --- Load personas ---
-    manager_prompt = load_persona("manager")
-    developer_prompt = load_persona("developer")
-    qa_prompt = load_persona("tester")
+async def workspace_changes(mcp_session, token=""):
+    """Files changed in the server's workspace since token, from its changed_since index"""
+    result = await mcp_session.call_tool("changed_since", {"token": token})
+    return json.loads(result.content[0].text)
 
-    # --- Define MCP server launch parameters ---
-    dev_params = StdioServerParameters(
-        command="python",
-        args=["mcps/dev_tools.py"],
-        env=None
-    )
 
-    qa_params = StdioServerParameters(
-        command="python",
-        args=["mcps/qa_tools.py"],
-        env=None
-    )
+async def workspace_snapshot(mcp_session):
+    """path -> (size, sha256 prefix) for every file the server indexes.
+    Comes from the server's index, which only re-hashes files whose size or mtime moved
+    """
+    listing = await workspace_changes(mcp_session)
+    return {c["path"]: (c["size"], c["sha256"]) for c in listing["changes"] if c["exists"]}
 
-    # --- Start MCP sessions ---
-    async with stdio_client(dev_params) as (dev_read, dev_write), \
-               stdio_client(qa_params) as (qa_read, qa_write):
 
-        async with ClientSession(dev_read, dev_write) as dev_mcp, \
-                   ClientSession(qa_read, qa_write) as qa_mcp:
+async def run_swarm(user_request, workspace, llm, job_id, pool):
+    tag = f"[{job_id}] " if job_id else ""
 
-            await dev_mcp.initialize()
-            await qa_mcp.initialize()
+    # --- Initialize LLM provider ---
+    if llm is None:
+        llm = build_llm()
 
-            # 1️⃣ Manager creates spec
-            mgr_resp = gemini.models.generate_content(
-                model="gemini-3-flash-preview",
+    # --- Load personas ---
+    manager_prompt = load_persona("manager")
+    developer_prompt = load_persona("developer")
+    qa_prompt = load_persona("tester")
+
+    # --- Lease warm MCP servers bound to this workspace ---
+    async with pool.lease(os.path.abspath(workspace)) as (dev_mcp, qa_mcp):
+
+        # 1️⃣ Manager creates spec
+        with span("manager_spec"):
+            mgr_resp = await generate(
+                llm,
+                "manager",
+                model=llm.fast_model,
                 contents=user_request,
-                config={
-                    "system_instruction": manager_prompt,
-                    "temperature": 0.7
-                }
+                system_prompt=manager_prompt,
+                temperature=0.7
             )
 
-            spec = mgr_resp.text
-            print("\nManager Spec:\n", spec)
+        spec = mgr_resp.text
+        print(f"\n{tag}Manager Spec:\n", spec)
+
+        # 2️⃣ Developer builds (one conversation kept across all QA rounds)
+        dev_context = ConversationContext()
+        with span("dev_round", round=0):
+            dev_output = await run_dev(spec, dev_mcp, llm, developer_prompt, cwd=workspace, context=dev_context)
+        seen = await workspace_snapshot(dev_mcp)
+        print(f"\n{tag}Developer Output:\n", dev_output)
+
+        # 3️⃣ QA evaluates
+        qa_input = f"""
+            Manager Spec:
+            {spec}
+
+            Developer Output:
+            {dev_output}
+
+            Please test the code and report any issues.
+        """
+
+        with span("qa_round", round=0):
+            qa_output = await run_qa(qa_input, qa_mcp, llm, qa_prompt)
+        qa_token = (await workspace_changes(dev_mcp))["token"]
+        print(f"\n{tag}QA Result:\n", qa_output)
+
+        # 4️⃣ Iterative refinement loop
+        iteration = 0
+        MAX_ITERS = 10
+        qa_skipped = False
+
+        # Check for common failure indicators
+        while iteration < MAX_ITERS and any(keyword in qa_output.lower() for keyword in ['fail', 'error', 'issue', 'bug', 'problem']):
+            iteration += 1
+            print(f"\n{tag}🔁 Iteration {iteration}")
+
+            # Only the QA delta goes to the developer, plus what the workspace looks like now
+            current = await workspace_snapshot(dev_mcp)
+            with span("dev_round", round=iteration):
+                dev_output = await run_dev(
+                    f"QA Feedback:\n{qa_output}\n\n"
+                    f"Workspace files (unchanged files are as you last saw them, no need to re-read):\n"
+                    f"{format_workspace_summary(current, seen)}\n\n"
+                    + ("Note: you changed no files last round, so QA was not re-run and its feedback still stands.\n\n"
+                       if qa_skipped else "")
+                    + "Fix all reported issues.",
+                    dev_mcp,
+                    llm,
+                    developer_prompt,
+                    cwd=workspace,
+                    context=dev_context
+                )
+            seen = await workspace_snapshot(dev_mcp)
 
-            # 2️⃣ Developer builds
-            dev_output = await run_dev(spec, dev_mcp, gemini, developer_prompt)
-            print("\nDeveloper Output:\n", dev_output)
+            # Nothing in dev-space changed since QA last looked: its verdict can't have changed either
+            changes = await workspace_changes(dev_mcp, qa_token)
+            qa_skipped = not changes["changes"]
+            if qa_skipped:
+                logging.info(f"{tag}No dev-space changes since the last QA round, skipping QA")
+                print(f"\n{tag}⏭ No files changed, QA round {iteration} skipped")
+                continue
 
-            # 3️⃣ QA evaluates
             qa_input = f"""
                 Manager Spec:
                 {spec}
@@ -231,61 +422,104 @@ async def make_it(user_request):
                 Please test the code and report any issues.
             """
 
-            qa_output = await run_qa(qa_input, qa_mcp, gemini, qa_prompt)
-            print("\nQA Result:\n", qa_output)
-
-            # 4️⃣ Iterative refinement loop
-            iteration = 0
-            MAX_ITERS = 10
-
-            # Check for common failure indicators
-            while iteration < MAX_ITERS and any(keyword in qa_output.lower() for keyword in ['fail', 'error', 'issue', 'bug', 'problem']):
-                iteration += 1
-                print(f"\n🔁 Iteration {iteration}")
-
-                dev_output = await run_dev(
-                    f"{spec}\n\nQA Feedback:\n{qa_output}\n\nFix all reported issues.",
-                    dev_mcp,
-                    gemini,
-                    developer_prompt
-                )
-
-                qa_input = f"""
-                    Manager Spec:
-                    {spec}
+            with span("qa_round", round=iteration):
+                qa_output = await run_qa(qa_input, qa_mcp, llm, qa_prompt)
+            qa_token = (await workspace_changes(dev_mcp))["token"]
+            print(f"\n{tag}QA Result (Iteration {iteration}):\n", qa_output)
 
-                    Developer Output:
-                    {dev_output}
+        print(f"\n{tag}✅ Final QA Result:\n", qa_output)
+        return qa_output
 
-                    Please test the code and report any issues.
-                """
+# -------------------------------------------------------
+# JOB SCHEDULER (BATCH MODE)
+# -------------------------------------------------------
 
-                qa_output = await run_qa(qa_input, qa_mcp, gemini, qa_prompt)
-                print(f"\nQA Result (Iteration {iteration}):\n", qa_output)
+def read_requests(source):
+    """One request per non-empty line from a file, or stdin when source is '-'"""
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, "r") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+async def run_job(job_id, user_request, llm, pool, limit, timeout):
+    """Runs one request in its own jobs/<job_id>/ workspace pair"""
+    workspace = os.path.join(JOBS_ROOT, job_id)
+    reset_workspace(workspace)
+    async with limit:
+        start = time.monotonic()
+        logging.info(f"[{job_id}] Started: {user_request}")
+        try:
+            qa_output = await asyncio.wait_for(
+                make_it(user_request, workspace=workspace, llm=llm, job_id=job_id, pool=pool),
+                timeout=timeout
+            )
+            status = "pass" if "STATUS: PASS" in (qa_output or "").upper() else "fail"
+        except asyncio.TimeoutError:
+            qa_output, status = f"Timed out after {timeout}s", "timeout"
+        except Exception as e:
+            logging.exception(f"[{job_id}] Crashed")
+            qa_output, status = f"Job error: {e}", "error"
+        elapsed = time.monotonic() - start
+        logging.info(f"[{job_id}] Finished with status {status} in {elapsed:.1f}s")
+    return {
+        "job": job_id,
+        "request": user_request,
+        "workspace": workspace,
+        "status": status,
+        "seconds": round(elapsed, 1),
+        "trace": os.path.join(workspace, "trace.jsonl"),
+        "result": qa_output,
+    }
+
+
+async def run_batch(requests, concurrency=2, timeout=1800):
+    """Runs all requests concurrently, at most `concurrency` at a time, and writes jobs/summary.json"""
+    llm = build_llm()
+    limit = asyncio.Semaphore(concurrency)
+    async with build_pool(concurrency) as pool:
+        results = await asyncio.gather(*(
+            run_job(f"job-{i:03d}", request, llm, pool, limit, timeout)
+            for i, request in enumerate(requests, start=1)
+        ))
+    os.makedirs(JOBS_ROOT, exist_ok=True)  # no job created it if the request list was empty
+    with open(os.path.join(JOBS_ROOT, "summary.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    for r in results:
+        print(f"{r['job']}: {r['status']} ({r['seconds']}s) {r['request']}")
+    return results
 
-            print("\n✅ Final QA Result:\n", qa_output)
 
 # -------------------------------------------------------
 # CLI ENTRY
 # -------------------------------------------------------
 
 def cleanup():
-    if os.path.exists("dev-space/"):
-        shutil.rmtree("dev-space/")
-    if os.path.exists("qa-space/"):
-        shutil.rmtree("qa-space/")
-
-    os.makedirs("dev-space/")
-    os.makedirs("qa-space/")
+    reset_workspace(".")
     print("############# Cleanup of directories successful #############")
 async def main():
+    parser = argparse.ArgumentParser(description="Run the development swarm")
+    parser.add_argument("--batch", metavar="FILE", help="file with one request per line, or '-' for stdin")
+    parser.add_argument("--concurrency", type=int, default=2, help="max jobs running at once in batch mode")
+    parser.add_argument("--timeout", type=float, default=1800, help="per-job timeout in seconds in batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        await run_batch(read_requests(args.batch), args.concurrency, args.timeout)
+        return
+
     user_input = "A cli based calculator that evaluates whatever expression I put into it, for simple BODMAS ops only"
     cleanup()
     await make_it(user_input)
 
 if __name__ == "__main__":
+    _log_listener.start()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         print("\n🛑 Interrupted by user. Shutting down gracefully...")
-        sys.exit(0)
\ No newline at end of file
+        sys.exit(0)
+    finally:
+        _log_listener.stop()
\ No newline at end of file
@@ -0,0 +1,286 @@
+"""Async LLM provider layer used by the orchestrator.
+
+The agent loops only need "generate with tools, give me text + function
+calls", so every backend implements LLMProvider.generate() and returns an
+LLMResponse. Conversation history stays in google.genai `types.Content`
+form (the format the loops already build); providers translate from it.
+
+- GeminiProvider: genai async surface (client.aio)
+- AnthropicProvider: anthropic.AsyncAnthropic with tool_use blocks
+- StubProvider: scripted responses, no network, for offline runs and CI
+
+Every model round trip is awaited on the SDK's async client, so a 10-70s
+call yields the event loop instead of freezing it.
+"""
+import asyncio
+import contextvars
+import json
+import os
+from google.genai import types
+
+# Upper bound on in-flight model calls per provider (shared by all jobs in a process)
+LLM_CONCURRENCY = int(os.environ.get("SWARM_LLM_CONCURRENCY", "4"))
+
+
+class LLMResponse:
+    """Provider-neutral result of one generate call"""
+
+    def __init__(self, text, function_calls=None, content=None, usage=None):
+        self.text = text
+        self.function_calls = function_calls or []
+        # Model turn to append to the history (types.Content, role "model")
+        self.content = content
+        # {"input_tokens": int, "output_tokens": int} when the provider reports it
+        self.usage = usage or {}
+
+
+class LLMProvider:
+    """Base class: generate with tools, returning text + function calls"""
+
+    name = "base"
+
+    def __init__(self, model: str, fast_model: str = None, max_concurrency: int = LLM_CONCURRENCY):
+        self.model = model
+        self.fast_model = fast_model or model
+        self._limit = asyncio.Semaphore(max_concurrency)
+
+    async def generate(self, contents, system_prompt: str, temperature: float, tools=None, model: str = None) -> LLMResponse:
+        """Runs one model call
+            Args: contents (prompt string or list of str/types.Content), system_prompt: str,
+                  temperature: float, tools (list of genai types.Tool), model: str (defaults to self.model)
+        """
+        async with self._limit:
+            return await self._generate(contents, system_prompt, temperature, tools, model or self.model)
+
+    async def _generate(self, contents, system_prompt, temperature, tools, model) -> LLMResponse:
+        raise NotImplementedError
+
+
+# -------------------------------------------------------
+# GEMINI
+# -------------------------------------------------------
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: str = None, model: str = "gemini-3-pro-preview",
+                 fast_model: str = "gemini-3-flash-preview", **kwargs):
+        super().__init__(model, fast_model, **kwargs)
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use, so replaying from a cache needs no API key
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    async def _generate(self, contents, system_prompt, temperature, tools, model):
+        resp = await self.client.aio.models.generate_content(
+            model=model,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                system_instruction=system_prompt,
+                temperature=temperature,
+                tools=tools
+            ),
+        )
+        usage = {}
+        if resp.usage_metadata:
+            usage = {
+                "input_tokens": resp.usage_metadata.prompt_token_count or 0,
+                "output_tokens": resp.usage_metadata.candidates_token_count or 0,
+            }
+        content = resp.candidates[0].content if resp.candidates else None
+        return LLMResponse(resp.text, resp.function_calls, content, usage)
+
+
+# -------------------------------------------------------
+# ANTHROPIC
+# -------------------------------------------------------
+
+def _to_anthropic_tools(tools):
+    return [
+        {
+            "name": fd.name,
+            "description": fd.description or "",
+            "input_schema": fd.parameters_json_schema or {"type": "object", "properties": {}},
+        }
+        for tool in tools or []
+        for fd in tool.function_declarations or []
+    ]
+
+
+def _to_anthropic_messages(contents):
+    if isinstance(contents, str):
+        contents = [contents]
+    messages = []
+    for content in contents:
+        if isinstance(content, str):
+            messages.append({"role": "user", "content": content})
+            continue
+        blocks = []
+        for part in content.parts or []:
+            if part.text:
+                blocks.append({"type": "text", "text": part.text})
+            elif part.function_call:
+                blocks.append({
+                    "type": "tool_use",
+                    "id": part.function_call.id,
+                    "name": part.function_call.name,
+                    "input": part.function_call.args or {},
+                })
+            elif part.function_response:
+                result = part.function_response.response or {}
+                blocks.append({
+                    "type": "tool_result",
+                    "tool_use_id": part.function_response.id,
+                    "content": str(result.get("result", json.dumps(result))),
+                })
+        role = "assistant" if content.role == "model" else "user"
+        messages.append({"role": role, "content": blocks})
+    return messages
+
+
+class AnthropicProvider(LLMProvider):
+    name = "anthropic"
+
+    def __init__(self, api_key: str = None, model: str = "claude-opus-4-6",
+                 fast_model: str = "claude-haiku-4-5", max_tokens: int = 8192, **kwargs):
+        super().__init__(model, fast_model, **kwargs)
+        self.api_key = api_key
+        self.max_tokens = max_tokens
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from anthropic import AsyncAnthropic
+            self._client = AsyncAnthropic(api_key=self.api_key)
+        return self._client
+
+    async def _generate(self, contents, system_prompt, temperature, tools, model):
+        request = {
+            "model": model,
+            "max_tokens": self.max_tokens,
+            "system": system_prompt,
+            "temperature": temperature,
+            "messages": _to_anthropic_messages(contents),
+        }
+        if tools:
+            request["tools"] = _to_anthropic_tools(tools)
+        msg = await self.client.messages.create(**request)
+
+        texts, calls, parts = [], [], []
+        for block in msg.content:
+            if block.type == "text":
+                texts.append(block.text)
+                parts.append(types.Part(text=block.text))
+            elif block.type == "tool_use":
+                call = types.FunctionCall(id=block.id, name=block.name, args=block.input)
+                calls.append(call)
+                parts.append(types.Part(function_call=call))
+        usage = {"input_tokens": msg.usage.input_tokens, "output_tokens": msg.usage.output_tokens}
+        text = "".join(texts) or None
+        return LLMResponse(text, calls, types.Content(role="model", parts=parts), usage)
+
+
+# -------------------------------------------------------
+# STUB (offline)
+# -------------------------------------------------------
+
+# Used when no script is given: a manager spec, a developer that writes and
+# runs one file, and a QA pass that runs it. Enough to exercise every layer.
+DEFAULT_STUB_SCRIPT = {
+    "Product manager": [
+        {"text": "# Spec\nWrite dev-space/hello.py that prints 'hello'."}
+    ],
+    "Python developer": [
+        {"function_calls": [
+            {"name": "list_cwd_contents", "args": {"path": "dev-space"}},
+            {"name": "get_structure", "args": {"directory": "dev-space"}},
+        ]},
+        {"function_calls": [
+            {"name": "write_file", "args": {"filepath": "dev-space/hello.py", "content": "print('hello')\n"}},
+        ]},
+        {"function_calls": [
+            {"name": "read_file", "args": {"filepath": "dev-space/hello.py"}},
+        ]},
+        {"text": "IMPLEMENTATION COMPLETE\n\nTesting instructions for QA:\npython dev-space/hello.py\nExpected: hello"},
+    ],
+    "QA tester": [
+        {"function_calls": [
+            {"name": "list_cwd_contents", "args": {"path": "dev-space"}},
+            {"name": "run_test", "args": {"command": "python dev-space/hello.py"}},
+        ]},
+        {"text": "STATUS: PASS"},
+    ],
+}
+
+
+# Per-task script positions, so concurrent jobs sharing one StubProvider each
+# replay the script from the start
+_stub_cursors = contextvars.ContextVar("stub_cursors", default=None)
+
+
+class StubProvider(LLMProvider):
+    """Deterministic provider that plays back canned responses.
+
+    The script maps a key to a list of responses; the key is matched as a
+    substring of the system prompt (so one script can drive the manager,
+    developer and tester personas), with "*" as a fallback. Each response is
+    {"text": str, "function_calls": [{"name": str, "args": dict}]}. Once a
+    key's list runs out its last response is repeated. Positions are tracked
+    per asyncio task, i.e. per job.
+    """
+
+    name = "stub"
+
+    def __init__(self, script=None, latency: float = 0.0, model: str = "stub", **kwargs):
+        super().__init__(model, model, **kwargs)
+        if isinstance(script, str):
+            with open(script, "r") as f:
+                script = json.load(f)
+        self.script = script or DEFAULT_STUB_SCRIPT
+        self.latency = latency
+
+    def _next(self, system_prompt):
+        key = next((k for k in self.script if k != "*" and k in (system_prompt or "")), "*")
+        responses = self.script.get(key)
+        if not responses:
+            return {"text": "STATUS: FAIL - stub script has no response for this prompt"}
+        cursors = _stub_cursors.get()
+        if cursors is None:
+            cursors = {}
+            _stub_cursors.set(cursors)
+        i = cursors.get((id(self), key), 0)
+        cursors[(id(self), key)] = i + 1
+        return responses[min(i, len(responses) - 1)]
+
+    async def _generate(self, contents, system_prompt, temperature, tools, model):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        step = self._next(system_prompt)
+        calls = [
+            types.FunctionCall(id=f"stub-{i}", name=c["name"], args=c.get("args", {}))
+            for i, c in enumerate(step.get("function_calls", []))
+        ]
+        parts = [types.Part(text=step["text"])] if step.get("text") else []
+        parts += [types.Part(function_call=call) for call in calls]
+        return LLMResponse(step.get("text"), calls, types.Content(role="model", parts=parts))
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "anthropic": AnthropicProvider,
+    "stub": StubProvider,
+}
+
+
+def get_provider(name: str, **kwargs) -> LLMProvider:
+    """Builds a provider by name ("gemini", "anthropic" or "stub")"""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}', expected one of {sorted(PROVIDERS)}")
+    return PROVIDERS[name](**kwargs)
@@ -0,0 +1,148 @@
+"""Record-and-replay cache for LLM calls.
+
+CachingProvider wraps any LLMProvider and stores each response on disk under
+the sha256 of everything that determines it: provider, model, system prompt,
+contents, tool schema and temperature. Modes:
+
+- record:      always call the model, store the response
+- replay:      only serve from the cache; a miss raises CacheMiss
+- auto:        serve hits, call the model and store on a miss
+- passthrough: no caching at all
+
+Entries live in <cache_dir>/<key[:2]>/<key>.json. A hit bumps the file's
+mtime, and once the cache grows past max_bytes the least recently used
+entries are deleted. Replayed runs are only exact while tool outputs are
+deterministic (a tool result that embeds a timestamp changes every later key).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from google.genai import types
+
+from llm import LLMProvider, LLMResponse
+
+CACHE_MODES = ("record", "replay", "auto", "passthrough")
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+def _dump(obj):
+    if isinstance(obj, str):
+        return obj
+    return json.loads(obj.model_dump_json(exclude_none=True))
+
+
+def request_key(provider: str, model: str, system_prompt: str, contents, tools, temperature) -> str:
+    """Content hash identifying one model request"""
+    if isinstance(contents, str):
+        contents = [contents]
+    payload = {
+        "provider": provider,
+        "model": model,
+        "system_prompt": system_prompt,
+        "contents": [_dump(c) for c in contents],
+        "tools": [_dump(t) for t in tools or []],
+        "temperature": temperature,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class CachingProvider(LLMProvider):
+    """LLMProvider wrapper serving responses from a content-addressed disk cache"""
+
+    def __init__(self, inner: LLMProvider, cache_dir: str, mode: str = "auto", max_bytes: int = 256 * 2**20):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.inner = inner
+        self.name = inner.name
+        self.model = inner.model
+        self.fast_model = inner.fast_model
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                if name.endswith(".json"):
+                    path = os.path.join(dirpath, name)
+                    st = os.stat(path)
+                    yield path, st.st_size, st.st_mtime_ns
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(path)  # mark as recently used
+        content = None
+        if entry["content"] is not None:
+            content = types.Content.model_validate_json(json.dumps(entry["content"]))
+        calls = [p.function_call for p in (content.parts or []) if p.function_call] if content else []
+        return LLMResponse(entry["text"], calls, content, entry["usage"])
+
+    def _store(self, key, model, resp):
+        entry = {
+            "key": key,
+            "provider": self.name,
+            "model": model,
+            "text": resp.text,
+            "content": _dump(resp.content) if resp.content is not None else None,
+            "usage": resp.usage,
+        }
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        old = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += os.path.getsize(path) - old
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= self.max_bytes:
+                break
+            os.remove(path)
+            self._size -= size
+        logging.info(f"[LLM CACHE] Evicted down to {self._size} bytes")
+
+    async def generate(self, contents, system_prompt: str, temperature: float, tools=None, model: str = None) -> LLMResponse:
+        model = model or self.model
+        if self.mode == "passthrough":
+            return await self.inner.generate(contents, system_prompt, temperature, tools, model)
+
+        key = request_key(self.name, model, system_prompt, contents, tools, temperature)
+        if self.mode in ("replay", "auto"):
+            resp = self._load(key)
+            if resp is not None:
+                self.hits += 1
+                return resp
+            self.misses += 1
+            if self.mode == "replay":
+                raise CacheMiss(f"No recorded response for request {key[:12]} (model {model})")
+
+        resp = await self.inner.generate(contents, system_prompt, temperature, tools, model)
+        self._store(key, model, resp)
+        return resp
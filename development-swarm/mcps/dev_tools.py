@@ -1,60 +1,86 @@
+import asyncio
+import os
 from pathlib import Path
-import functools
+import json
 import file_tools
 import run_tools
-from mcp.server.fastmcp import FastMCP
+import fs_index
+from workspace_policy import WorkspacePolicy
+from mcp.server.fastmcp import FastMCP, Context
 
 mcp = FastMCP("dev-tools server")
 """Server with tools that can be accessed by the developer agent"""
 
 PROJECT_ROOT = Path(__file__).parent.parent
-DEV_SPACE = PROJECT_ROOT / "dev-space"
-
-def check_correct_ws(path: str) -> bool:
-    return Path(path).resolve().is_relative_to(DEV_SPACE.resolve())
-
-def require_dev_space(func):
-    @functools.wraps(func)
-    def wrapper(path: str = ".", *args, **kwargs):
-        if not check_correct_ws(path):
-            return f"Access denied: '{path}' is outside dev-space/"
-        return func(path, *args, **kwargs)
-    return wrapper
-
-def require_dev_space_kwarg(argname: str):
-    """For functions where the path argument isn't the first positional arg"""
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            path = kwargs.get(argname) or (args[0] if args else None)
-            if not path or not check_correct_ws(path):
-                return f"Access denied: '{path}' is outside dev-space/"
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
+# The orchestrator points each job at its own workspace (holding dev-space/ and qa-space/)
+WORKSPACE_ROOT = Path(os.environ.get("SWARM_WORKSPACE", PROJECT_ROOT))
+DEV_SPACE = WORKSPACE_ROOT / "dev-space"
+# Change feed over the workspace, polled on each changed_since/stat_many call
+INDEX = fs_index.WorkspaceIndex([DEV_SPACE], WORKSPACE_ROOT)
+
+# Guards every path-taking argument, commands included (see workspace_policy.py)
+POLICY = WorkspacePolicy(WORKSPACE_ROOT, ("dev-space",))
 
 
 #### GUARDED TOOLS #######
-mcp.tool()(require_dev_space_kwarg("path")(file_tools.list_cwd_contents))
-mcp.tool()(require_dev_space_kwarg("directory")(file_tools.mkdir))
-mcp.tool()(require_dev_space_kwarg("filepath")(file_tools.read_file))
-mcp.tool()(require_dev_space_kwarg("filepath")(file_tools.rm))
-mcp.tool()(require_dev_space_kwarg("filepath")(file_tools.write_file))
-mcp.tool()(require_dev_space_kwarg("directory")(run_tools.get_structure))
-# mcp.tool()(require_dev_space_kwarg("path")(run_tools.run_python_script))
+mcp.tool()(POLICY.require("path")(file_tools.list_cwd_contents))
+mcp.tool()(POLICY.require("directory")(file_tools.mkdir))
+mcp.tool()(POLICY.require("filepath")(file_tools.read_file))
+mcp.tool()(POLICY.require("filepath")(file_tools.rm))
+mcp.tool()(POLICY.require("filepath")(file_tools.write_file))
+mcp.tool()(POLICY.require("filepath")(file_tools.apply_patch))
+mcp.tool()(POLICY.require("filepath")(file_tools.replace_range))
+mcp.tool()(POLICY.require("directory")(run_tools.get_structure))
+mcp.tool()(POLICY.require_list("filepaths")(file_tools.read_files))
+mcp.tool()(POLICY.require_list("files", key="filepath")(file_tools.write_files))
+mcp.tool()(POLICY.require_list("directories")(file_tools.mkdirs))
+mcp.tool()(POLICY.require_list("filepaths")(file_tools.rm_files))
+# mcp.tool()(POLICY.require("path")(run_tools.run_python_script))
 
 @mcp.tool()
-def execute_and_log_command(rawcommand: str, logfile: str) -> str:
+@POLICY.require("logfile")
+@POLICY.require_command("rawcommand")
+async def execute_and_log_command(rawcommand: str, logfile: str, timeout: int = 60, ctx: Context = None) -> str:
     """Runs a command and logs output, logfile must be inside dev-space/
-       Args: rawcommand: str (command to run), logfile: str (path of log file)
+       Args: rawcommand: str (command to run), logfile: str (path of log file),
+             timeout: int (seconds before the command is killed)
+    """
+    return await run_tools.execute_and_log_command(rawcommand, logfile, timeout, ctx)
+
+@mcp.tool()
+async def changed_since(token: str = "") -> str:
+    """Lists files added, modified or deleted in dev-space/ since token, with size and sha256 prefix.
+       Pass the token from the previous call; an empty or stale token returns every file (full=true).
+       Args: token: str (token returned by the previous changed_since call)
     """
-    if not check_correct_ws(logfile):
-        return f"Access denied: '{logfile}' is outside dev-space/"
-    return run_tools.execute_and_log_command(rawcommand, logfile)
+    return json.dumps(await asyncio.to_thread(INDEX.changed_since, token))
+
+@mcp.tool()
+@POLICY.require_list("paths")
+async def stat_many(paths: list[str]) -> str:
+    """Size and sha256 prefix for each path, to check which files changed without reading them
+       Args: paths: list[str] (file paths)
+    """
+    return json.dumps(await asyncio.to_thread(INDEX.stat_many, paths))
+
+mcp.tool()(POLICY.require_command("command")(run_tools.custom_command))
 
 #### GUARDED TOOLS END #######
 mcp.tool()(file_tools.sys_info)
-mcp.tool()(run_tools.custom_command)
+
+#### ORCHESTRATOR TOOLS (hidden from the agent) #######
+@mcp.tool()
+def bind_workspace(root: str) -> str:
+    """Points this server at another job workspace, so a warm server can be reused across jobs
+       Args: root: str (workspace directory holding dev-space/)
+    """
+    global WORKSPACE_ROOT, DEV_SPACE, INDEX
+    WORKSPACE_ROOT = Path(root).resolve()
+    DEV_SPACE = WORKSPACE_ROOT / "dev-space"
+    INDEX = fs_index.WorkspaceIndex([DEV_SPACE], WORKSPACE_ROOT)
+    POLICY.bind(WORKSPACE_ROOT)
+    os.chdir(WORKSPACE_ROOT)
+    return f"Workspace bound: {WORKSPACE_ROOT}"
 
 if __name__ == "__main__":
     mcp.run(transport="stdio")
\ No newline at end of file
@@ -1,28 +1,43 @@
 from mcp.server.fastmcp import FastMCP
+import asyncio
+import hashlib
+import mmap
 import os
-import subprocess
-from run_tools import custom_command
+import re
+import shutil
+import tempfile
+from run_tools import custom_command, off_thread, run_streaming
+import fs_tree
 from typing import Optional
 
 # instantiate an MCP server client
 mcp = FastMCP("File Interactions Server")
 """An mcp server made with tools to support File interactions"""
 
+# Files bigger than this are memory-mapped so only the requested slice is touched
+MMAP_THRESHOLD = 1 << 20
+
+# Read once at import: os.umask can only be read by setting it, which isn't safe once tools run in threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 
 @mcp.tool()
+@off_thread
 def list_cwd_contents(path: Optional[str] = ".")->str:
-    """Lists the contents of the current working directory
+    """Lists the contents of the current working directory (mode, size and name of each entry)
         Args: path: str (path of the directory whose contents  need to be listed)
     """
-
-    return str(subprocess.check_output(["ls",path,"-lar"]), "utf-8")
+    return fs_tree.list_dir(path or ".")
 
 @mcp.tool()
-def sys_info()->str:
+async def sys_info()->str:
     """Returns system information from fastfetch"""
-    return str(subprocess.check_output(["fastfetch"]), "utf-8")
+    code, stdout, stderr = await run_streaming(["fastfetch"], timeout=30)
+    return stdout if code == 0 else f"fastfetch failed (exit code {code}):\n{stderr}"
 
 @mcp.tool()
+@off_thread
 def mkdir(directory:str)->str:
     """Creates a directory based on the provided path
         Args: directory: str (path of the directory you want to create)
@@ -32,25 +47,259 @@ def mkdir(directory:str)->str:
 
 
 
+def _line_span(buf, size:int, start_line:int, end_line:Optional[int])->tuple:
+    """Byte offsets covering 1-based lines start_line..end_line (inclusive) of buf"""
+    start = 0
+    for _ in range(start_line - 1):
+        nl = buf.find(b"\n", start)
+        if nl == -1:
+            return size, size
+        start = nl + 1
+    if end_line is None:
+        return start, size
+    end = start
+    for _ in range(end_line - start_line + 1):
+        nl = buf.find(b"\n", end)
+        if nl == -1:
+            return start, size
+        end = nl + 1
+    return start, end
+
+def _tail_span(buf, size:int, lines:int)->tuple:
+    """Byte offsets covering the last `lines` lines of buf"""
+    end = size
+    # A trailing newline ends the last line rather than starting a new one
+    pos = size - 1 if size and buf[size - 1:size] == b"\n" else size
+    for _ in range(lines):
+        nl = buf.rfind(b"\n", 0, pos)
+        if nl == -1:
+            return 0, end
+        pos = nl
+    return pos + 1, end
+
+def _read_slice(buf, size:int, offset:int, length:Optional[int], start_line:Optional[int],
+                end_line:Optional[int], head:Optional[int], tail:Optional[int])->bytes:
+    if tail is not None:
+        start, end = _tail_span(buf, size, tail)
+    elif head is not None:
+        start, end = _line_span(buf, size, 1, head)
+    elif start_line is not None or end_line is not None:
+        start, end = _line_span(buf, size, max(start_line or 1, 1), end_line)
+    else:
+        start = min(max(offset, 0), size)
+        end = size if length is None else min(start + max(length, 0), size)
+    return buf[start:end]
+
 @mcp.tool()
-def read_file(filepath:str)->str:
-    """Reads a file based on the provided filepath
-        Args: filepath: str (path of the file you want to read)
+@off_thread
+def read_file(filepath:str, offset:int=0, length:Optional[int]=None,
+              start_line:Optional[int]=None, end_line:Optional[int]=None,
+              head:Optional[int]=None, tail:Optional[int]=None)->str:
+    """Reads a file based on the provided filepath. Reads the whole file unless a range is given;
+    for big files/logs prefer a range (tail=50 for the end of a log, start_line/end_line for a section).
+        Args: filepath: str (path of the file you want to read),
+              offset: int (byte offset to start at), length: int (number of bytes to read),
+              start_line: int (first line, 1-based), end_line: int (last line, inclusive),
+              head: int (first N lines), tail: int (last N lines)
     """
-    with open(filepath, "r") as f:
-        return f.read()
-    return f"Read File Failed: {filepath}"
+    with open(filepath, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ""
+        if size <= MMAP_THRESHOLD:
+            data = f.read()
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = _read_slice(mm, size, offset, length, start_line, end_line, head, tail)
+            return data.decode("utf-8", errors="replace")
+    return _read_slice(data, size, offset, length, start_line, end_line, head, tail).decode("utf-8", errors="replace")
+
+def _atomic_write(filepath:str, content:str)->str:
+    """Writes to a temp file next to filepath and renames it into place. Returns the sha256 of content"""
+    data = content.encode()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filepath) or ".", prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if os.path.exists(filepath):
+            shutil.copymode(filepath, tmp)
+        else:  # mkstemp creates 0600; a new file gets the usual 0666 & ~umask
+            os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, filepath)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return hashlib.sha256(data).hexdigest()[:12]
 
 @mcp.tool()
+@off_thread
 def write_file(filepath:str, content:str)->str:
     """Writes a file based on the provided filepath and content
     Args: filepath: str (path you want to write into), content: str (what you want to write)
     """
-    with open(filepath, "w") as f:
-        f.write(content)
-    return f"File written successfully: {filepath}"
+    sha = _atomic_write(filepath, content)
+    return f"File written successfully: {filepath} (sha256 {sha})"
+
+def _apply_search_replace(text:str, patch:str)->tuple:
+    """SEARCH/REPLACE blocks replace whole lines, line endings included, so an empty REPLACE
+    deletes the lines. A SEARCH that matches no whole lines is tried as exact text within lines.
+    """
+    blocks = re.findall(r"<<<<<<< SEARCH\n(.*?)\n?=======\n(.*?)\n?>>>>>>> REPLACE", patch, re.S)
+    if not blocks:
+        raise ValueError("no SEARCH/REPLACE blocks found")
+    trailing_newline = text.endswith("\n")
+    # leading "\n" so every line, the first included, starts after one; trailing so every line ends in one
+    text = "\n" + text + ("" if trailing_newline else "\n")
+    for i, (search, replace) in enumerate(blocks, start=1):
+        old, new = "\n" + search + "\n", "\n" + replace + "\n" if replace else "\n"
+        count = len(re.findall(f"(?={re.escape(old)})", text))  # overlapping, so repeated lines all count
+        if count == 0:
+            old, new = search, replace
+            count = text.count(old)
+        if count != 1:
+            raise ValueError(f"block {i}: SEARCH text found {count} times, it must match exactly once")
+        text = text.replace(old, new, 1)
+    text = text[1:]
+    return (text if trailing_newline or not text.endswith("\n") else text[:-1]), len(blocks)
+
+def _apply_unified_diff(text:str, patch:str)->tuple:
+    lines = text.split("\n")
+    hunks = []
+    for line in patch.split("\n"):
+        header = re.match(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@", line)
+        if header:
+            hunks.append((int(header.group(1)), [], []))
+        elif hunks and line[:1] in (" ", "-", "+") and not line.startswith(("--- ", "+++ ")):
+            _, old, new = hunks[-1]
+            if line[0] in (" ", "-"):
+                old.append(line[1:])
+            if line[0] in (" ", "+"):
+                new.append(line[1:])
+        elif hunks and line == "":
+            # Blank context lines sometimes lose their leading space
+            hunks[-1][1].append("")
+            hunks[-1][2].append("")
+    if not hunks:
+        raise ValueError("no @@ hunks found")
+
+    shift = 0
+    for i, (start, old, new) in enumerate(hunks, start=1):
+        while old and new and old[-1] == "" and new[-1] == "":
+            old.pop()
+            new.pop()
+        expected = max(start - 1 + shift, 0)
+        matches = [j for j in range(len(lines) - len(old) + 1) if lines[j:j + len(old)] == old]
+        if not matches:
+            raise ValueError(f"hunk {i} (line {start}): context does not match the file")
+        at = min(matches, key=lambda j: abs(j - expected))
+        lines[at:at + len(old)] = new
+        shift += len(new) - len(old)
+    return "\n".join(lines), len(hunks)
+
+@mcp.tool()
+@off_thread
+def apply_patch(filepath:str, patch:str)->str:
+    """Edits part of an existing file instead of rewriting all of it. The patch is either
+    SEARCH/REPLACE blocks (each SEARCH must match exactly once):
+        <<<<<<< SEARCH
+        old lines
+        =======
+        new lines
+        >>>>>>> REPLACE
+    or a unified diff with @@ hunks. The file is written atomically.
+    Args: filepath: str (file to edit), patch: str (SEARCH/REPLACE blocks or unified diff)
+    """
+    with open(filepath, "r") as f:
+        text = f.read()
+    try:
+        if "<<<<<<< SEARCH" in patch:
+            text, n = _apply_search_replace(text, patch)
+        else:
+            text, n = _apply_unified_diff(text, patch)
+    except ValueError as e:
+        return f"Patch failed, file unchanged: {e}"
+    sha = _atomic_write(filepath, text)
+    return f"Patched {filepath}: {n} change(s) applied, now {len(text.splitlines())} lines (sha256 {sha})"
+
+@mcp.tool()
+@off_thread
+def replace_range(filepath:str, start_line:int, end_line:int, content:str)->str:
+    """Replaces lines start_line..end_line (1-based, inclusive) of a file with content.
+    Use end_line = start_line - 1 to insert before start_line without removing anything.
+    Args: filepath: str (file to edit), start_line: int, end_line: int, content: str (replacement lines)
+    """
+    with open(filepath, "r") as f:
+        text = f.read()
+    # Line numbers as read_file shows them: a final newline ends the last line, it doesn't start another
+    trailing_newline = text.endswith("\n") if text else content.endswith("\n")
+    body = text[:-1] if text.endswith("\n") else text
+    lines = body.split("\n") if text else []
+    if not 1 <= start_line <= len(lines) + 1 or not start_line - 1 <= end_line <= len(lines):
+        return f"Replace failed, file unchanged: lines {start_line}-{end_line} are outside 1-{len(lines)}"
+    new = content[:-1] if content.endswith("\n") else content
+    lines[start_line - 1:end_line] = new.split("\n") if content else []
+    text = "\n".join(lines) + ("\n" if trailing_newline and lines else "")
+    sha = _atomic_write(filepath, text)
+    return f"Replaced lines {start_line}-{end_line} of {filepath}, now {len(text.splitlines())} lines (sha256 {sha})"
+
+@mcp.tool()
+async def read_files(filepaths:list[str])->str:
+    """Reads several files in one call, each under its own ===== path ===== header
+    Args: filepaths: list[str] (paths of the files you want to read)
+    """
+    results = await asyncio.gather(*(read_file(filepath) for filepath in filepaths), return_exceptions=True)
+    out = []
+    for filepath, result in zip(filepaths, results):
+        if isinstance(result, Exception):
+            out.append(f"===== {filepath} (failed: {result}) =====")
+        else:
+            out.append(f"===== {filepath} =====\n{result}")
+    return "\n".join(out)
+
+@mcp.tool()
+async def write_files(files:list[dict[str, str]])->str:
+    """Writes several files in one call, one result line per file
+    Args: files: list of {"filepath": str, "content": str}
+    """
+    out = []
+    for item in files:
+        try:
+            out.append(await write_file(item["filepath"], item["content"]))
+        except Exception as e:
+            out.append(f"Write failed: {item.get('filepath')}: {e}")
+    return "\n".join(out)
+
+@mcp.tool()
+@off_thread
+def mkdirs(directories:list[str])->str:
+    """Creates several directories (and any missing parents) in one call
+    Args: directories: list[str] (paths of the directories you want to create)
+    """
+    out = []
+    for directory in directories:
+        try:
+            os.makedirs(directory, exist_ok=True)
+            out.append(f"Directory {directory} created")
+        except Exception as e:
+            out.append(f"Create failed: {directory}: {e}")
+    return "\n".join(out)
+
+@mcp.tool()
+async def rm_files(filepaths:list[str])->str:
+    """Removes several files in one call
+    Args: filepaths: list[str] (paths of the files you want to remove)
+    """
+    out = []
+    for filepath in filepaths:
+        try:
+            out.append(await rm(filepath))
+        except Exception as e:
+            out.append(f"Remove failed: {filepath}: {e}")
+    return "\n".join(out)
 
 @mcp.tool()
+@off_thread
 def rm(filepath:str)->str:
     """Removes a file based on the provided filepath
     Args: filepath: str (path of the file you want to remove)
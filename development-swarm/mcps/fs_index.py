@@ -0,0 +1,147 @@
+"""Incremental file index for a workspace, with a change feed.
+
+WorkspaceIndex keeps path -> (size, mtime_ns, sha256) for every file under
+its roots. Each query first refreshes by mtime polling: one scandir walk
+plus a stat per file, re-hashing only files whose size or mtime moved (and
+recording a change only if the content hash really differs). Every change
+gets a sequence number, so agents and the orchestrator can ask "what changed
+since token X" instead of re-listing and re-reading everything.
+
+Tokens look like "<epoch>-<seq>". The epoch is derived from the roots, so
+the same job gets the same tokens on every run (agent-visible tool results
+stay replayable); a fresh index over other roots (the server was re-bound
+to another job) has another epoch, and an index re-created over the same
+roots in one process gets a numbered one. A token from another epoch gets
+a full listing back.
+"""
+import hashlib
+import os
+import threading
+
+from fs_tree import DEFAULT_IGNORE, _ignored
+
+# Oldest changes are dropped past this; older tokens then get a full listing
+MAX_CHANGES = 10000
+
+# Indexes created per roots in this process, so a re-created index never reuses an epoch
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+def _epoch(roots, base):
+    """Short hash of base and roots, numbered from the second index over the same roots"""
+    key = "\0".join([base] + roots)
+    with _generations_lock:
+        generation = _generations[key] = _generations.get(key, 0) + 1
+    digest = hashlib.sha256(key.encode()).hexdigest()[:8]
+    return digest if generation == 1 else f"{digest}.{generation}"
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class WorkspaceIndex:
+    """Path -> (size, mtime, hash) index of the files under roots, keyed relative to base"""
+
+    def __init__(self, roots, base, ignore=DEFAULT_IGNORE):
+        self.roots = [str(r) for r in roots]
+        self.base = str(base)
+        self.ignore = ignore
+        self.epoch = _epoch(self.roots, self.base)
+        self.seq = 0
+        self.files = {}     # path -> {"size", "mtime_ns", "sha256"}
+        self.changes = []   # (seq, path, event)
+        self._lock = threading.RLock()  # queries run in worker threads
+
+    @property
+    def token(self):
+        return f"{self.epoch}-{self.seq}"
+
+    def _walk(self, path):
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if _ignored(entry.name, self.ignore):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self._walk(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    def _record(self, path, event):
+        self.seq += 1
+        self.changes.append((self.seq, path, event))
+        if len(self.changes) > MAX_CHANGES:
+            del self.changes[:len(self.changes) - MAX_CHANGES]
+
+    def refresh(self):
+        """Polls the roots and records added/modified/deleted files"""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        seen = set()
+        for root in self.roots:
+            for entry in self._walk(root):
+                path = os.path.relpath(entry.path, self.base)
+                seen.add(path)
+                st = entry.stat(follow_symlinks=False)
+                old = self.files.get(path)
+                if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                    continue
+                try:
+                    sha = file_sha256(entry.path)
+                except OSError:
+                    continue
+                self.files[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+                if old is None:
+                    self._record(path, "added")
+                elif old["sha256"] != sha:
+                    self._record(path, "modified")
+        for path in [p for p in self.files if p not in seen]:
+            del self.files[path]
+            self._record(path, "deleted")
+
+    def _entry(self, path):
+        info = self.files.get(path)
+        if info is None:
+            return {"path": path, "exists": False}
+        return {"path": path, "exists": True, "size": info["size"], "sha256": info["sha256"][:12]}
+
+    def changed_since(self, token=""):
+        """Files changed after token (latest event per path) plus the token to use next time"""
+        with self._lock:
+            return self._changed_since(token)
+
+    def _changed_since(self, token):
+        self.refresh()
+        epoch, _, seq = (token or "").partition("-")
+        oldest = self.changes[0][0] if self.changes else self.seq + 1
+        if epoch != self.epoch or not seq.isdigit() or int(seq) < oldest - 1:
+            return {
+                "token": self.token,
+                "full": True,
+                "changes": [dict(self._entry(p), event="present") for p in sorted(self.files)],
+            }
+        latest = {}
+        for change_seq, path, event in self.changes:
+            if change_seq > int(seq):
+                latest[path] = event
+        return {
+            "token": self.token,
+            "full": False,
+            "changes": [dict(self._entry(p), event=e) for p, e in sorted(latest.items())],
+        }
+
+    def stat_many(self, paths):
+        """Size and hash for each path, as of a fresh poll"""
+        with self._lock:
+            self.refresh()
+            return [self._entry(os.path.relpath(os.path.abspath(p), self.base)) for p in paths]
@@ -0,0 +1,100 @@
+"""In-process directory listing helpers shared by file_tools and run_tools.
+
+Replaces shelling out to `tree` / `ls`: one os.scandir walk with a depth
+limit, ignore patterns and an entry cap. Rendered trees are cached keyed by
+the mtimes of every directory that was walked; adding, removing or renaming
+an entry bumps its directory's mtime, so an unchanged workspace is served
+from the cache after one stat per directory.
+"""
+import fnmatch
+import os
+import stat
+import threading
+
+DEFAULT_IGNORE = (".git", "__pycache__", ".venv", "venv", "node_modules",
+                  ".mypy_cache", ".pytest_cache", ".ruff_cache", "*.egg-info")
+
+# (root, max_depth, ignore, max_entries) -> (dir mtime signature, rendered tree)
+_tree_cache = {}
+TREE_CACHE_SIZE = 64
+_tree_cache_lock = threading.Lock()  # tools run in worker threads
+
+
+def _ignored(name, ignore):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in ignore)
+
+
+def _scan(path, ignore):
+    """Sorted (name, is_dir) entries of one directory, ignore patterns applied"""
+    with os.scandir(path) as it:
+        entries = [(e.name, e.is_dir(follow_symlinks=False)) for e in it if not _ignored(e.name, ignore)]
+    return sorted(entries, key=lambda e: (not e[1], e[0]))
+
+
+def render_tree(root, max_depth=3, ignore=DEFAULT_IGNORE, max_entries=500):
+    """Returns (tree text, signature) for root; the signature lists (dir, mtime_ns) of every walked dir"""
+    lines = [root.rstrip("/") + "/"]
+    signature = []
+    counts = {"dirs": 0, "files": 0, "shown": 0}
+    truncated = False
+
+    def walk(path, prefix, depth):
+        nonlocal truncated
+        signature.append((path, os.stat(path).st_mtime_ns))
+        try:
+            entries = _scan(path, ignore)
+        except PermissionError:
+            lines.append(f"{prefix}└── [permission denied]")
+            return
+        for i, (name, is_dir) in enumerate(entries):
+            if counts["shown"] >= max_entries:
+                truncated = True
+                return
+            last = i == len(entries) - 1
+            lines.append(f"{prefix}{'└── ' if last else '├── '}{name}{'/' if is_dir else ''}")
+            counts["shown"] += 1
+            counts["dirs" if is_dir else "files"] += 1
+            if is_dir and depth < max_depth:
+                walk(os.path.join(path, name), prefix + ("    " if last else "│   "), depth + 1)
+
+    walk(root, "", 1)
+    lines.append(f"\n{counts['dirs']} directories, {counts['files']} files")
+    if truncated:
+        lines.append(f"(truncated at {max_entries} entries; narrow the directory or lower max_depth)")
+    return "\n".join(lines), tuple(signature)
+
+
+def cached_tree(root, max_depth=3, ignore=DEFAULT_IGNORE, max_entries=500):
+    """render_tree() served from the cache while no walked directory's mtime has changed"""
+    key = (os.path.abspath(root), max_depth, tuple(ignore), max_entries)
+    hit = _tree_cache.get(key)
+    if hit:
+        signature, text = hit
+        try:
+            if all(os.stat(path).st_mtime_ns == mtime for path, mtime in signature):
+                return text
+        except FileNotFoundError:
+            pass
+    text, signature = render_tree(root, max_depth, ignore, max_entries)
+    with _tree_cache_lock:
+        if len(_tree_cache) >= TREE_CACHE_SIZE:
+            _tree_cache.pop(next(iter(_tree_cache)))
+        _tree_cache[key] = (signature, text)
+    return text
+
+
+def list_dir(path, ignore=(), max_entries=500):
+    """ls -l style listing of one directory: mode, size and name per entry"""
+    lines = []
+    with os.scandir(path) as it:
+        entries = sorted((e for e in it if not _ignored(e.name, ignore)), key=lambda e: e.name)
+    for entry in entries[:max_entries]:
+        st = entry.stat(follow_symlinks=False)
+        suffix = "/" if stat.S_ISDIR(st.st_mode) else ""
+        if stat.S_ISLNK(st.st_mode):
+            suffix = f" -> {os.readlink(entry.path)}"
+        lines.append(f"{stat.filemode(st.st_mode)} {st.st_size:>10} {entry.name}{suffix}")
+    header = f"total {len(entries)} entries in {path}"
+    if len(entries) > max_entries:
+        lines.append(f"... {len(entries) - max_entries} more entries not shown")
+    return "\n".join([header] + lines)
@@ -0,0 +1,183 @@
+"""Pre-started one-shot Python workers for run_test.
+
+Starting `python script.py` through a shell costs a shell, interpreter
+startup and site imports before the script's first line runs. WorkerPool
+keeps a few interpreters already booted (running this file), each blocked
+on a single JSON job line on its stdin:
+
+    {"script": "dev-space/app.py", "argv": [...], "cwd": "...", "cpu_seconds": 11}
+    {"module": "unittest", "argv": [...], "cwd": "...", "cpu_seconds": 11}
+
+Workers apply the pool's memory and file size rlimits to themselves at
+boot (no preexec_fn: that isn't safe once the server process has other
+threads, and asyncio.to_thread's pool means it always does) and the
+job's CPU limit once its line arrives. The worker then closes its stdin,
+chdirs, sets sys.argv/sys.path[0] the way `python script.py` /
+`python -m module` would and runs the code with runpy, so its stdout,
+stderr and exit status are the command's own. Each worker runs exactly
+one job and exits, and a replacement is started right away, so no state
+leaks from one test run into the next.
+
+Only plain `python <script> [args]` and `python -m <module> [args]`
+commands qualify; anything that needs a shell (pipes, redirects, globs,
+variables) or other interpreter flags goes through the normal subprocess
+path.
+"""
+import asyncio
+import importlib
+import json
+import os
+import runpy
+import shlex
+import subprocess
+import sys
+import traceback
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Characters that mean the command needs a real shell
+SHELL_CHARS = set("|&;<>$`*?(){}[]~\n")
+PYTHON_NAMES = ("python", "python3")
+
+
+def parse_command(command: str):
+    """Job dict for a plain python script/module command, or None if it must run in a shell"""
+    if SHELL_CHARS & set(command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if len(argv) < 2 or argv[0] not in PYTHON_NAMES:
+        return None
+    if argv[1] == "-m":
+        if len(argv) < 3:
+            return None
+        return {"module": argv[2], "argv": argv[2:]}
+    if argv[1].startswith("-"):
+        return None
+    return {"script": argv[1], "argv": argv[1:]}
+
+
+class WorkerPool:
+    """Keeps size booted worker interpreters ready; each one runs a single job"""
+
+    def __init__(self, size: int, limits: dict = None, preload=()):
+        """limits: rlimits every worker sets on itself at boot, e.g. {"RLIMIT_AS": 2**31}"""
+        self.size = size
+        self.env = dict(os.environ, SWARM_WORKER_PRELOAD=",".join(preload),
+                        SWARM_WORKER_LIMITS=json.dumps(limits or {}))
+        self._ready = asyncio.Queue()
+        self._started = False
+        self._refills = set()
+
+    async def _spawn(self):
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+            env=self.env,
+        )
+        self._ready.put_nowait(proc)
+
+    async def run(self, job: dict, cwd: str, cpu_seconds: int = None):
+        """Hands job to a ready worker and returns its process; read its output with run_tools.collect"""
+        if not self._started:
+            self._started = True
+            await asyncio.gather(*(self._spawn() for _ in range(self.size)))
+        while True:
+            if self._ready.empty():
+                await self._spawn()
+            proc = self._ready.get_nowait()
+            refill = asyncio.create_task(self._spawn())  # replace it while this job runs
+            self._refills.add(refill)
+            refill.add_done_callback(self._refills.discard)
+            if proc.returncode is None:
+                break
+        proc.stdin.write(json.dumps(dict(job, cwd=cwd, cpu_seconds=cpu_seconds)).encode() + b"\n")
+        await proc.stdin.drain()
+        proc.stdin.close()
+        return proc
+
+
+# -------------------------------------------------------
+# WORKER SIDE
+# -------------------------------------------------------
+
+def _apply_limits(limits: dict):
+    for name, value in limits.items():
+        try:
+            resource.setrlimit(getattr(resource, name), (value, value))
+        except (ValueError, OSError, AttributeError):
+            pass
+
+
+def _limit_cpu(seconds):
+    """RLIMIT_CPU counts from process start, so the boot time already used is added on"""
+    if resource is None or not seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime) + seconds
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _print_exception(exc):
+    """Traceback without the worker's and runpy's own frames, like a direct `python script.py`"""
+    tb = exc.__traceback__
+    while tb and tb.tb_frame.f_code.co_filename in (__file__, runpy.__file__, "<frozen runpy>"):
+        tb = tb.tb_next
+    traceback.print_exception(type(exc), exc, tb)
+
+
+def serve():
+    if resource is not None:
+        _apply_limits(json.loads(os.environ.get("SWARM_WORKER_LIMITS") or "{}"))
+    for name in filter(None, os.environ.get("SWARM_WORKER_PRELOAD", "").split(",")):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+    line = sys.stdin.readline()
+    if not line:  # pool shut down before handing out a job
+        return 0
+    job = json.loads(line)
+
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    sys.stdin = open(0, closefd=False)
+
+    os.chdir(job["cwd"])
+    _limit_cpu(job.get("cpu_seconds"))
+    sys.argv = list(job["argv"])
+    try:
+        if "module" in job:
+            sys.path[0] = os.getcwd()
+            runpy.run_module(job["module"], run_name="__main__", alter_sys=True)
+        elif not os.path.isfile(job["script"]):
+            print(f"{sys.executable}: can't open file {os.path.abspath(job['script'])!r}: "
+                  f"[Errno 2] No such file or directory", file=sys.stderr)
+            return 2
+        else:
+            script = os.path.abspath(job["script"])
+            sys.path[0] = os.path.dirname(script)
+            runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        return e.code
+    except BaseException as e:
+        _print_exception(e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
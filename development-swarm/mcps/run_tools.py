@@ -1,56 +1,309 @@
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
+import asyncio
+import difflib
+import functools
+import logging
 import os
+import shlex
+import shutil
+import signal
 import subprocess
+import sys
+import time
+from collections import deque
 from typing import Optional
+import fs_tree
+import py_worker
+
+try:
+    import resource
+except ImportError:  # not available on Windows; commands then run without rlimits
+    resource = None
 
 mcp = FastMCP("OS Interactions Server")
 """An mcp server made with tools to support OS interactions"""
 
+# Output kept for the tool result: the first and last half of this many bytes
+OUTPUT_CAP_BYTES = int(os.environ.get("SWARM_OUTPUT_CAP", 32 * 1024))
+# Resource limits applied to every command run by these tools
+MEM_LIMIT_MB = int(os.environ.get("SWARM_RUN_MEM_MB", 2048))
+FILE_LIMIT_MB = int(os.environ.get("SWARM_RUN_FILE_MB", 256))
+# Minimum seconds between progress notifications
+PROGRESS_INTERVAL = 0.5
+# Warm interpreters for plain `python ...` test commands (0 disables them)
+PY_WORKERS = int(os.environ.get("SWARM_PY_WORKERS", 2))
+PY_WORKER_PRELOAD = tuple(filter(None, os.environ.get("SWARM_PY_WORKER_PRELOAD", "unittest").split(",")))
+# Applies rlimits to a command by wrapping it; the python shim below is the fallback
+PRLIMIT = shutil.which("prlimit")
+# Tests run_tests_batch runs at once
+TEST_CONCURRENCY = int(os.environ.get("SWARM_TEST_CONCURRENCY", os.cpu_count() or 2))
+
+
+def off_thread(func):
+    """Turns a blocking tool into a coroutine run in a worker thread, so the server's
+    event loop keeps serving other calls while it works. The signature is kept for FastMCP.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
+
+
+class CappedOutput:
+    """Keeps the head and tail of a byte stream, counting what was dropped in between"""
+
+    def __init__(self, cap: int = OUTPUT_CAP_BYTES):
+        self.half = cap // 2
+        self.head = bytearray()
+        self.tail = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        room = self.half - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail.append(data)
+            self.tail_size += len(data)
+            while self.tail_size - len(self.tail[0]) >= self.half:
+                self.tail_size -= len(self.tail.popleft())
+
+    def text(self) -> str:
+        tail = b"".join(self.tail)[-self.half:] if self.tail else b""
+        dropped = self.total - len(self.head) - len(tail)
+        middle = f"\n... [{dropped} bytes truncated] ...\n" if dropped else ""
+        return self.head.decode(errors="replace") + middle + tail.decode(errors="replace")
+
+
+# Sets the rlimits named in argv[1], e.g. "RLIMIT_AS=1024,RLIMIT_CPU=5", then execs argv[2:]
+_RLIMIT_SHIM = """import os, resource, sys
+for item in filter(None, sys.argv[1].split(",")):
+    name, value = item.split("=")
+    try:
+        resource.setrlimit(getattr(resource, name), (int(value), int(value)))
+    except (ValueError, OSError):
+        pass
+os.execvp(sys.argv[2], sys.argv[2:])
+"""
+
+
+def _rlimits(cpu_seconds: int = None) -> dict:
+    """The rlimits for a command, each capped at the current hard limit (a child can't raise it)"""
+    if resource is None:
+        return {}
+    limits = {"RLIMIT_AS": MEM_LIMIT_MB * 2**20, "RLIMIT_FSIZE": FILE_LIMIT_MB * 2**20}
+    if cpu_seconds:
+        limits["RLIMIT_CPU"] = cpu_seconds
+    for name, value in limits.items():
+        hard = resource.getrlimit(getattr(resource, name))[1]
+        if hard != resource.RLIM_INFINITY:
+            limits[name] = min(value, hard)
+    return limits
+
+
+def _limited(argv: list, cpu_seconds: int = None) -> list:
+    """argv wrapped so it runs under the CPU, address space and file size limits.
+    The limits used to be set in a preexec_fn, which is not safe once the parent process has other
+    threads, and the server always has them (asyncio.to_thread's pool), whichever thread spawns
+    """
+    limits = _rlimits(cpu_seconds)
+    if not limits:
+        return list(argv)
+    if PRLIMIT:
+        options = {"RLIMIT_AS": "--as", "RLIMIT_FSIZE": "--fsize", "RLIMIT_CPU": "--cpu"}
+        return [PRLIMIT, *(f"{options[name]}={value}" for name, value in limits.items()), "--", *argv]
+    spec = ",".join(f"{name}={value}" for name, value in limits.items())
+    return [sys.executable, "-S", "-c", _RLIMIT_SHIM, spec, *argv]
+
+
+async def run_streaming(command, timeout: int, ctx: Context = None, sink=None, shell: bool = False):
+    """Runs a command (argv list, or a string with shell=True) and collects its output"""
+    argv = ["/bin/sh", "-c", command] if shell else command
+    proc = await asyncio.create_subprocess_exec(
+        *_limited(argv, timeout + 1),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=os.getcwd(),
+        start_new_session=True,
+    )
+    return await collect(proc, timeout, ctx, sink)
+
+
+async def collect(proc, timeout: int, ctx: Context = None, sink=None):
+    """Reads a running process's stdout and stderr as they arrive, until it exits or times out.
+    Every chunk goes to sink (a binary file) in full and into a CappedOutput per stream; when
+    ctx is given the latest output line is sent as an MCP progress notification, at most
+    every PROGRESS_INTERVAL seconds. Returns (exit code or None on timeout, stdout, stderr).
+    The process must have been started in its own session so a timeout can kill its group.
+    """
+    stdout, stderr = CappedOutput(), CappedOutput()
+    received = 0
+    last_report = 0.0
+
+    async def pump(stream, output):
+        nonlocal received, last_report
+        while chunk := await stream.read(4096):
+            output.write(chunk)
+            if sink:
+                sink.write(chunk)
+            received += len(chunk)
+            now = time.monotonic()
+            if ctx is not None and now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                line = chunk.rstrip().rsplit(b"\n", 1)[-1].decode(errors="replace")
+                await ctx.report_progress(received, message=line[-200:])
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(pump(proc.stdout, stdout), pump(proc.stderr, stderr), proc.wait()), timeout
+        )
+        code = proc.returncode
+    except asyncio.TimeoutError:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+        code = None
+    return code, stdout.text(), stderr.text()
+
+
+_workers = py_worker.WorkerPool(PY_WORKERS, limits=_rlimits(), preload=PY_WORKER_PRELOAD) \
+    if PY_WORKERS and resource is not None else None
+
 
 @mcp.tool()
-def get_structure(directory: Optional[str]=".")->str:
-    """ Tree command to understand the directory structure 
+@off_thread
+def get_structure(directory: Optional[str]=".", max_depth: int=3, max_entries: int=500)->str:
+    """ Tree view to understand the directory structure (skips .git, __pycache__, venvs)
         Args: 
         directory - str - the directory whose structure needs to be checked
+        max_depth - int - how many levels deep to show
+        max_entries - int - stop listing after this many entries
     """
-    return str(subprocess.check_output(["tree",directory,"-aL","3"], shell=True), "utf-8")
+    return fs_tree.cached_tree(directory or ".", max_depth, fs_tree.DEFAULT_IGNORE, max_entries)
 
 @mcp.tool()
-def execute_and_log_command(rawcommand:str, logfile:str)->str:
-    """ Function to log the output of a command to a given file 
-    Args: 
+async def execute_and_log_command(rawcommand: str, logfile: str, timeout: int = 60, ctx: Context = None) -> str:
+    """ Function to log the output of a command to a given file
+    Args:
         rawcommand - str - command that needs to be ran
         logfile: - str - path of the log file
+        timeout - int - seconds before the command is killed
     """
-    command_list=rawcommand.split(" ")
-    with open(logfile, "w") as log_file:
-        subprocess.run(command_list, stdout=log_file, stderr=log_file)
-    return f"Command {rawcommand} executed and logged to {logfile}"
+    with open(logfile, "wb") as log_file:
+        code, _, _ = await run_streaming(shlex.split(rawcommand), timeout=timeout, ctx=ctx, sink=log_file)
+    status = f"timed out after {timeout}s" if code is None else f"exited with code {code}"
+    return f"Command {rawcommand} executed ({status}) and logged to {logfile}"
+
+async def _run_python(command: str, timeout: int, ctx: Context = None):
+    """Runs a python test command on a warm worker when possible, else through the shell"""
+    job = py_worker.parse_command(command)
+    if job and _workers is not None:
+        proc = await _workers.run(job, os.getcwd(), cpu_seconds=timeout + 1)
+        return await collect(proc, timeout, ctx)
+    return await run_streaming(command, timeout=timeout, ctx=ctx, shell=True)
 
 @mcp.tool()
-def run_test(command: str) -> str:
+async def run_test(command: str, timeout: int = 10, ctx: Context = None) -> str:
     """Execute a python command to test a python script
-    and return output (auto-approved for testing)
-    Args: command: str (command to run)
+    and return output (auto-approved for testing). Long output keeps its head and tail.
+    Args: command: str (command to run), timeout: int (seconds before the test is killed)
     """
     allowed_commands=["python"]
     if command.split(" ")[0] in allowed_commands:
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=os.getcwd()
-            )
-            return f"Exit code: {result.returncode}\nOutput:\n{result.stdout}\nErrors:\n{result.stderr}"
+            code, stdout, stderr = await _run_python(command, timeout, ctx)
         except Exception as e:
             return f"Execution failed: {str(e)}"
+        if code is None:
+            return f"Execution failed: timed out after {timeout}s\nOutput:\n{stdout}\nErrors:\n{stderr}"
+        return f"Exit code: {code}\nOutput:\n{stdout}\nErrors:\n{stderr}"
+
+
+def _output_diff(expected: str, actual: str, max_lines: int = 20) -> str:
+    """Unified diff of expected vs actual stdout, trailing whitespace ignored, at most max_lines"""
+    diff = list(difflib.unified_diff(
+        [line.rstrip() for line in expected.strip().splitlines()],
+        [line.rstrip() for line in actual.strip().splitlines()],
+        "expected", "actual", lineterm="", n=1
+    ))
+    if len(diff) > max_lines:
+        diff = diff[:max_lines] + [f"... {len(diff) - max_lines} more diff lines"]
+    return "\n".join(diff)
+
+@mcp.tool()
+async def run_tests_batch(tests: list[dict], timeout: int = 10, ctx: Context = None) -> str:
+    """Runs several python test commands concurrently and returns one pass/fail table.
+    Use this instead of several run_test calls. A test passes when it exits with
+    expected_exit (default 0) and, if expected is given, its stdout matches it
+    (trailing whitespace ignored). Failures include a diff or the end of stderr.
+    Args: tests: list[dict] (each {"command": str, "expected": str optional, "expected_exit": int optional}),
+          timeout: int (seconds per test)
+    """
+    limit = asyncio.Semaphore(TEST_CONCURRENCY)
+    done = 0
 
+    async def one(test):
+        nonlocal done
+        command = test.get("command", "")
+        if command.split(" ")[0] != "python":
+            return "DENIED", None, 0.0, "only python commands can be run"
+        async with limit:
+            t0 = time.perf_counter()
+            try:
+                code, stdout, stderr = await _run_python(command, timeout)
+            except Exception as e:
+                return "ERROR", None, 0.0, f"Execution failed: {e}"
+            elapsed = time.perf_counter() - t0
+        done += 1
+        if ctx is not None:
+            await ctx.report_progress(done, len(tests), message=command)
+        if code is None:
+            return "TIMEOUT", None, elapsed, f"timed out after {timeout}s\n{stdout[-500:]}"
+        if code != test.get("expected_exit", 0):
+            return "FAIL", code, elapsed, (stderr or stdout)[-1000:].strip()
+        if test.get("expected") is not None:
+            diff = _output_diff(test["expected"], stdout)
+            if diff:
+                return "FAIL", code, elapsed, diff
+        return "PASS", code, elapsed, ""
+
+    results = await asyncio.gather(*(one(test) for test in tests))
+    passed = sum(status == "PASS" for status, *_ in results)
+    # Timings go to the server log only: in the result they would make every QA turn's
+    # request differ from run to run, so the LLM response cache could never replay it
+    lines = [f"{passed}/{len(tests)} passed", "  # | status  | exit | command"]
+    for i, (test, (status, code, elapsed, _)) in enumerate(zip(tests, results), 1):
+        exit_code = "-" if code is None else code
+        lines.append(f"{i:>3} | {status:<7} | {exit_code:>4} | {test.get('command', '')}")
+        logging.info(f"run_tests_batch: {status} in {elapsed:.2f}s: {test.get('command', '')}")
+    for i, (status, _, _, detail) in enumerate(results, 1):
+        if status != "PASS" and detail:
+            lines.append(f"\n--- test {i} ({status}) ---\n{detail}")
+    return "\n".join(lines)
 
 
 @mcp.tool()
-def custom_command(command: str)->str:
-    """Runs a custom command not available in the other tools"""
-    return str(subprocess.check_output(command_list, shell=True), "utf-8")
\ No newline at end of file
+async def custom_command(command: str, timeout: int = 60)->str:
+    """Runs a custom command not available in the other tools.
+    The command is split into an argv list and run without a shell, so ;, &&, | and $(...) are plain arguments
+    """
+    try:
+        argv = shlex.split(command)
+    except ValueError as e:
+        return f"Command failed: {e}"
+    if not argv:
+        return "Command failed: empty command"
+    try:
+        code, stdout, stderr = await run_streaming(argv, timeout=timeout)
+    except OSError as e:
+        return f"Command failed: {e}"
+    if code != 0:
+        status = f"timed out after {timeout}s" if code is None else f"exit code {code}"
+        return f"Command failed ({status}):\n{stdout}\n{stderr}"
+    return stdout
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""Path guard shared by the dev_tools and qa_tools servers.
+
+A WorkspacePolicy knows which spaces (dev-space/, qa-space/) of the bound
+workspace a server may touch. The space roots are resolved once, at bind
+time. Verdicts for individual paths are cached, keyed by the lexical
+absolute path and validated by the lstat mtimes of the directories between
+the space root and the path: creating, removing or re-pointing a symlink
+anywhere on that route changes one of those mtimes, so the cached verdict
+is dropped and the path is resolved again. Paths with ".." or a symlinked
+directory on the route, and paths lexically outside every space, always
+take the full realpath check.
+
+The require* decorators replace the per-server copies the servers used to
+carry; they keep async tools async so FastMCP still awaits them.
+
+require_command only looks at a command's arguments. An argument is
+checked as a path when it is ".", starts with "/", ".." or "~", has a ".."
+component, or names something that exists relative to the workspace root,
+so `rm -rf qa-space` and `rm -rf .` are denied while free-text inputs such
+as "10/2" or URLs pass.
+For tools that hand the command to a shell, unquoted shell syntax
+(; & | < > ( ) { } * ? [ ], newlines, $ and backticks) is rejected
+outright. What a program does with its arguments is not checked:
+`python -c "..."` can still touch any file, which is what command
+approval and the resource limits are for.
+"""
+import functools
+import inspect
+import os
+import shlex
+import stat
+
+# Verdicts kept per policy before the oldest are dropped
+VERDICT_CACHE_SIZE = 4096
+
+# Characters a shell acts on outside quotes; $ and ` also act inside double quotes
+SHELL_SYNTAX = set(";&|<>(){}*?[]\n")
+SHELL_EXPANSION = set("$`")
+
+
+def shell_syntax(command: str) -> list:
+    """Characters of command a shell would act on rather than pass through as text"""
+    found = set()
+    quote = None
+    escaped = False
+    for char in command or "":
+        if escaped:
+            escaped = False
+        elif quote == "'":
+            if char == "'":
+                quote = None
+        elif char == "\\":
+            escaped = True
+        elif char in SHELL_EXPANSION:
+            found.add(char)
+        elif quote == '"':
+            if char == '"':
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in SHELL_SYNTAX:
+            found.add(char)
+    return sorted(found)
+
+
+def _path_like(value: str) -> bool:
+    """True for ".", anything starting with "/", ".." or "~" or going up through "..", and existing paths.
+    Other arguments are data, even with a "/" in them ("10/2", URLs)
+    """
+    if value == "." or value.startswith(("/", "..", "~")) or ".." in value.split("/"):
+        return True
+    return bool(value) and os.path.lexists(value)
+
+
+def command_paths(command: str) -> list:
+    """Arguments of a command that are paths (including --opt=path values and a program given by path)"""
+    try:
+        tokens = shlex.split(command or "")
+    except ValueError:
+        tokens = (command or "").split()
+    paths = [tokens[0]] if tokens and "/" in tokens[0] else []
+    for token in tokens[1:]:
+        value = token
+        if value.startswith("-"):
+            if "=" not in value:
+                continue
+            value = value.split("=", 1)[1]
+        if _path_like(value):
+            paths.append(os.path.expanduser(value) if value.startswith("~") else value)
+    return paths
+
+
+def _guarded(func, denial):
+    """Wraps func so denial(args, kwargs) is checked first; a returned message replaces the call.
+    The wrapper is async when func is, so FastMCP still awaits it.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return denial(args, kwargs) or await func(*args, **kwargs)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return denial(args, kwargs) or func(*args, **kwargs)
+    return wrapper
+
+
+def _default(func, argname):
+    """Declared default of func's argname parameter, None if it has none"""
+    param = inspect.signature(func).parameters.get(argname)
+    if param is None or param.default is inspect.Parameter.empty:
+        return None
+    return param.default
+
+
+def _argument(argname, default, args, kwargs):
+    """Value of argname as the tool will see it: keyword, first positional, or the default"""
+    if argname in kwargs:
+        return kwargs[argname]
+    return args[0] if args else default
+
+
+class WorkspacePolicy:
+    """Which paths under a workspace root one server may touch"""
+
+    def __init__(self, root, spaces=("dev-space",)):
+        self.spaces = tuple(spaces)
+        self.label = " or ".join(f"{space}/" for space in self.spaces)
+        self._verdicts = {}
+        self.bind(root)
+
+    def bind(self, root):
+        """Points the policy at another workspace; the space roots are resolved here, once"""
+        root = os.path.abspath(root)
+        self.root = root
+        # (lexical root, resolved root) per space
+        self._roots = [(os.path.join(root, space), os.path.realpath(os.path.join(root, space)))
+                       for space in self.spaces]
+        self._verdicts.clear()
+
+    def _resolved_inside(self, path) -> bool:
+        real = os.path.realpath(path)
+        return any(real == resolved or real.startswith(resolved + os.sep) for _, resolved in self._roots)
+
+    def _signature(self, lexical_root, absolute, lstats):
+        """lstat mtimes of the directories from lexical_root down to absolute's parent.
+        None if one of them is a symlink (those are never cached). lstats memoizes across a batch.
+        """
+        signature = []
+        directory = lexical_root
+        rel = os.path.relpath(os.path.dirname(absolute), lexical_root)
+        parts = [] if rel == "." else rel.split(os.sep)
+        for part in [None] + parts:
+            if part is not None:
+                directory = os.path.join(directory, part)
+            if directory not in lstats:
+                try:
+                    lstats[directory] = os.lstat(directory)
+                except OSError:
+                    lstats[directory] = None
+            st = lstats[directory]
+            if st is None:  # route doesn't exist (yet); its creation bumps the parent's mtime
+                signature.append(None)
+                break
+            if stat.S_ISLNK(st.st_mode):
+                return None
+            signature.append(st.st_mtime_ns)
+        return tuple(signature)
+
+    def allowed(self, path, _lstats=None) -> bool:
+        """True if path resolves inside one of the policy's spaces"""
+        if not path:
+            return False
+        absolute = os.path.abspath(path)
+        if ".." in path.split(os.sep):
+            return self._resolved_inside(absolute)
+        lexical_root = next((lexical for lexical, _ in self._roots
+                             if absolute == lexical or absolute.startswith(lexical + os.sep)), None)
+        if lexical_root is None:  # only a symlink could bring it inside
+            return self._resolved_inside(absolute)
+        signature = self._signature(lexical_root, absolute, {} if _lstats is None else _lstats)
+        if signature is None:
+            return self._resolved_inside(absolute)
+        cached = self._verdicts.get(absolute)
+        if cached and cached[0] == signature:
+            return cached[1]
+        verdict = self._resolved_inside(absolute)
+        if len(self._verdicts) >= VERDICT_CACHE_SIZE:
+            self._verdicts.pop(next(iter(self._verdicts)))
+        self._verdicts[absolute] = (signature, verdict)
+        return verdict
+
+    def denied(self, paths) -> list:
+        """The paths that fall outside the spaces; directory lstats are shared across the batch"""
+        lstats = {}
+        return [p for p in paths if not isinstance(p, str) or not self.allowed(p, lstats)]
+
+    def command_denied(self, command: str) -> list:
+        """Path-like arguments of command that fall outside the spaces"""
+        return self.denied(command_paths(command))
+
+    # ---------------------------------------------------
+    # Tool decorators
+    # ---------------------------------------------------
+
+    def require(self, argname: str):
+        """Guards a tool whose argname argument is a path"""
+        def decorator(func):
+            default = _default(func, argname)
+
+            def denial(args, kwargs):
+                path = _argument(argname, default, args, kwargs)
+                if not isinstance(path, str) or not self.allowed(path):
+                    return f"Access denied: '{path}' is outside {self.label}"
+            return _guarded(func, denial)
+        return decorator
+
+    def require_list(self, argname: str, key: str = None):
+        """For batch tools: checks every path in a list argument in one pass before running anything.
+        key picks the path out of dict items (e.g. "filepath" for write_files)
+        """
+        def decorator(func):
+            default = _default(func, argname)
+
+            def denial(args, kwargs):
+                items = _argument(argname, default, args, kwargs)
+                if not items:
+                    return f"Nothing to do: '{argname}' is empty"
+                paths = [item.get(key) if key and isinstance(item, dict) else item for item in items]
+                denied = self.denied(paths)
+                if denied:
+                    return f"Access denied, nothing was done: {denied} outside {self.label}"
+            return _guarded(func, denial)
+        return decorator
+
+    def require_command(self, argname: str, key: str = None, shell: bool = False):
+        """Guards the path arguments of a command argument (key: a list of dicts holding commands).
+        shell: the tool runs the command through a shell, so shell syntax in it is refused
+        """
+        def decorator(func):
+            default = _default(func, argname)
+
+            def denial(args, kwargs):
+                value = _argument(argname, default, args, kwargs)
+                commands = [item.get(key, "") for item in value or [] if isinstance(item, dict)] if key else [value]
+                if shell:
+                    syntax = sorted({char for command in commands for char in shell_syntax(command)})
+                    if syntax:
+                        return (f"Access denied, nothing was run: shell syntax {syntax} is not allowed "
+                                f"in commands; quote it or run the steps as separate commands")
+                denied = [p for command in commands for p in self.command_denied(command)]
+                if denied:
+                    return f"Access denied, nothing was run: {denied} in command outside {self.label}"
+            return _guarded(func, denial)
+        return decorator
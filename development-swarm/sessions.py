@@ -0,0 +1,226 @@
+"""MCP session helpers used by the orchestrator.
+
+A ToolSession wraps a ClientSession and keeps its tool registry cached: the
+server is asked for list_tools() once, the Gemini tool declaration is built
+once from that list, and both are dropped only when the server announces
+notifications/tools/list_changed.
+
+McpPool keeps dev_tools/qa_tools server pairs running across jobs. A job
+leases a pair, the pair is pointed at the job's workspace with the hidden
+bind_workspace tool, and it goes back to the pool afterwards, so only the
+first job pays interpreter + FastMCP startup.
+"""
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from google.genai import types
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+import mcp.types
+
+from telemetry import span
+
+# Tools the orchestrator calls itself; never offered to or callable by the model
+ORCHESTRATOR_TOOLS = {"bind_workspace"}
+# Tries at starting a replacement for a dead server pair before a lease fails
+RESTART_ATTEMPTS = 2
+
+
+class ToolSession:
+    """MCP client session with a cached tool list and a prebuilt Gemini types.Tool"""
+
+    def __init__(self):
+        self.session = None
+        self._tools = None
+        self._gemini_tools = None
+        self._lock = asyncio.Lock()
+
+    async def message_handler(self, message):
+        """Passed to ClientSession so server notifications can invalidate the cache"""
+        if isinstance(message, mcp.types.ServerNotification) and \
+                isinstance(message.root, mcp.types.ToolListChangedNotification):
+            self.invalidate()
+
+    def invalidate(self):
+        self._tools = None
+        self._gemini_tools = None
+
+    async def list_tools(self):
+        """MCP tool definitions, fetched from the server at most once until invalidated"""
+        if self._tools is None:
+            async with self._lock:
+                if self._tools is None:
+                    tools = (await self.session.list_tools()).tools
+                    self._tools = [t for t in tools if t.name not in ORCHESTRATOR_TOOLS]
+        return self._tools
+
+    async def gemini_tools(self):
+        """The cached tool list converted to Gemini function declarations"""
+        if self._gemini_tools is None:
+            tools = await self.list_tools()
+            self._gemini_tools = [types.Tool(function_declarations=[
+                types.FunctionDeclaration(
+                    name=tool.name,
+                    description=tool.description,
+                    parameters_json_schema=tool.inputSchema
+                )
+                for tool in tools
+            ])]
+        return self._gemini_tools
+
+    async def call_tool(self, name, args, progress_callback=None):
+        if name in ORCHESTRATOR_TOOLS:
+            return mcp.types.CallToolResult(
+                content=[mcp.types.TextContent(type="text", text=f"Unknown tool: {name}")],
+                isError=True
+            )
+        return await self.session.call_tool(name, args, progress_callback=progress_callback)
+
+    async def bind_workspace(self, root):
+        """Re-points the server at a job workspace (orchestrator only)"""
+        result = await self.session.call_tool("bind_workspace", {"root": root})
+        if result.isError:
+            raise RuntimeError(f"bind_workspace failed: {result.content[0].text}")
+
+
+@asynccontextmanager
+async def tool_session(read, write):
+    """Opens and initializes a ClientSession over the given streams, yielding a ToolSession"""
+    tools = ToolSession()
+    async with ClientSession(read, write, message_handler=tools.message_handler) as session:
+        await session.initialize()
+        tools.session = session
+        yield tools
+
+
+# -------------------------------------------------------
+# WARM SERVER POOL
+# -------------------------------------------------------
+
+class McpServer:
+    """One long-lived MCP server process.
+    The stdio transport and session are entered and exited inside a dedicated
+    runner task (anyio requires that), which holds them open until stop().
+    """
+
+    def __init__(self, params: StdioServerParameters):
+        self.params = params
+        self.tools = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error = None
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self._error:
+            raise self._error
+        return self
+
+    async def _run(self):
+        try:
+            async with stdio_client(self.params) as (read, write):
+                async with tool_session(read, write) as tools:
+                    self.tools = tools
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            logging.warning(f"MCP server {self.params.args} exited: {e!r}")
+            self._error = e
+        finally:
+            self._ready.set()
+
+    async def healthy(self, timeout: float = 5.0) -> bool:
+        if self.tools is None or self._task.done():
+            return False
+        try:
+            await asyncio.wait_for(self.tools.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            await self._task
+
+
+class McpPool:
+    """Pool of initialized (dev_tools, qa_tools) server pairs shared by concurrent jobs"""
+
+    def __init__(self, size: int, dev_script: str, qa_script: str, python: str = "python", workspace: str = None):
+        self.size = size
+        # stdio_client passes only a few basic variables (HOME, PATH, ...) plus env to the server,
+        # so the SWARM_* settings (output cap, rlimits, workers, ...) are forwarded explicitly
+        env = {name: value for name, value in os.environ.items() if name.startswith("SWARM_")}
+        env["SWARM_WORKSPACE"] = workspace or os.getcwd()
+        self._params = [
+            StdioServerParameters(command=python, args=[script], env=env, cwd=workspace)
+            for script in (dev_script, qa_script)
+        ]
+        self._idle = asyncio.Queue()
+        self._all = []
+
+    async def _start_pair(self):
+        """Starts a dev/qa server pair; if either fails to start, the other is stopped before re-raising"""
+        pair = [McpServer(p) for p in self._params]
+        started = await asyncio.gather(*(server.start() for server in pair), return_exceptions=True)
+        errors = [result for result in started if isinstance(result, BaseException)]
+        if errors:
+            await asyncio.gather(*(server.stop() for server in pair), return_exceptions=True)
+            raise errors[0]
+        self._all.extend(pair)
+        return pair
+
+    async def __aenter__(self):
+        pairs = await asyncio.gather(*(self._start_pair() for _ in range(self.size)), return_exceptions=True)
+        errors = [result for result in pairs if isinstance(result, BaseException)]
+        if errors:  # __aexit__ won't run, so stop the pairs that did start
+            await self.__aexit__(None, None, None)
+            raise errors[0]
+        for pair in pairs:
+            self._idle.put_nowait(pair)
+        return self
+
+    async def __aexit__(self, *exc):
+        await asyncio.gather(*(server.stop() for server in self._all), return_exceptions=True)
+
+    async def _checked(self, pair):
+        """Returns the pair if both servers answer a ping, otherwise a freshly started pair.
+        pair is None for a slot whose last restart failed. Raises RuntimeError if no pair starts.
+        """
+        if pair is not None:
+            healthy = await asyncio.gather(*(server.healthy() for server in pair))
+            if all(healthy):
+                return pair
+            logging.warning("MCP server pair failed health check, restarting it")
+            await asyncio.gather(*(server.stop() for server in pair), return_exceptions=True)
+            for server in pair:
+                if server in self._all:
+                    self._all.remove(server)
+        for attempt in range(1, RESTART_ATTEMPTS + 1):
+            try:
+                return await self._start_pair()
+            except Exception as e:
+                error = e
+                logging.warning(f"MCP server pair failed to start (attempt {attempt}/{RESTART_ATTEMPTS}): {e!r}")
+        raise RuntimeError(f"Could not start an MCP server pair after {RESTART_ATTEMPTS} attempts: {error!r}") from error
+
+    @asynccontextmanager
+    async def lease(self, workspace: str):
+        """Yields (dev ToolSession, qa ToolSession) bound to workspace for the duration of a job"""
+        with span("mcp_lease"):
+            pair = await self._idle.get()
+        try:
+            with span("mcp_bind"):
+                try:
+                    pair = await self._checked(pair)
+                except RuntimeError:
+                    pair = None  # the slot goes back empty, so the next lease starts a new pair
+                    raise
+                await asyncio.gather(*(server.tools.bind_workspace(workspace) for server in pair))
+            yield pair[0].tools, pair[1].tools
+        finally:
+            self._idle.put_nowait(pair)
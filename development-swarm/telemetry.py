@@ -0,0 +1,166 @@
+"""Per-phase latency and token instrumentation for swarm runs.
+
+A Trace collects spans for one job. Spans nest through a context variable,
+so a tool call made inside a QA round becomes a child of that round even
+when several jobs (or several parallel tool calls) run at once. Every
+finished span is appended to the trace's JSONL file as it closes; at the end
+summary() aggregates them per span name (count, total, p50, p95, tokens,
+bytes) and works out the critical path through the job.
+
+    trace = Trace("jobs/job-001/trace.jsonl", job_id="job-001")
+    with trace.activate(), span("make_it"):
+        with span("llm.generate", model="...") as s:
+            ...
+            s["tokens_in"] = 1234
+"""
+import contextvars
+import itertools
+import json
+import time
+from contextlib import contextmanager
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+
+# Numeric span attributes that are summed in the report
+TOTALLED_ATTRS = ("tokens_in", "tokens_out", "bytes_in", "bytes_out")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Trace:
+    """Span sink for one job, written as JSONL"""
+
+    def __init__(self, path: str = None, job_id: str = None):
+        self.path = path
+        self.job_id = job_id
+        self.spans = []
+        self._ids = itertools.count(1)
+        self._file = open(path, "w") if path else None
+
+    @contextmanager
+    def activate(self):
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def emit(self, record):
+        self.spans.append(record)
+        if self._file:
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+
+    def close(self):
+        """Appends the summary record and closes the JSONL file"""
+        if self._file:
+            self._file.write(json.dumps(self.summary()) + "\n")
+            self._file.close()
+            self._file = None
+
+    def critical_path(self):
+        """Leaf spans that determine the end time of the root span, in order"""
+        children = {}
+        for s in self.spans:
+            children.setdefault(s["parent"], []).append(s)
+        roots = children.get(None, [])
+        if not roots:
+            return []
+
+        def walk(node):
+            kids = list(children.get(node["id"], []))
+            if not kids:
+                return [node]
+            chain, t = [], node["end"]
+            while True:
+                candidates = [k for k in kids if k["end"] <= t + 1e-6]
+                if not candidates:
+                    break
+                last = max(candidates, key=lambda k: k["end"])
+                chain.append(last)
+                kids.remove(last)
+                t = last["start"]
+            return [leaf for k in reversed(chain) for leaf in walk(k)]
+
+        return walk(max(roots, key=lambda r: r["end"] - r["start"]))
+
+    def summary(self):
+        """Aggregates spans by name and computes totals and the critical path"""
+        by_name = {}
+        for s in self.spans:
+            by_name.setdefault(s["name"], []).append(s)
+        phases = {}
+        for name, spans in by_name.items():
+            durations = [s["duration"] for s in spans]
+            phases[name] = {
+                "count": len(spans),
+                "total_s": round(sum(durations), 3),
+                "p50_s": round(percentile(durations, 50), 3),
+                "p95_s": round(percentile(durations, 95), 3),
+            }
+            for attr in TOTALLED_ATTRS:
+                total = sum(s.get(attr) or 0 for s in spans)
+                if total:
+                    phases[name][attr] = total
+        critical = {}
+        for leaf in self.critical_path():
+            entry = critical.setdefault(leaf["name"], {"count": 0, "total_s": 0.0})
+            entry["count"] += 1
+            entry["total_s"] = round(entry["total_s"] + leaf["duration"], 3)
+        roots = [s for s in self.spans if s["parent"] is None]
+        return {
+            "type": "summary",
+            "job": self.job_id,
+            "wall_s": round(max((r["duration"] for r in roots), default=0.0), 3),
+            "phases": phases,
+            "critical_path": critical,
+        }
+
+    def report(self):
+        """Human readable version of summary()"""
+        summary = self.summary()
+        lines = [f"Run report{' for ' + self.job_id if self.job_id else ''}: wall {summary['wall_s']}s"]
+        for name, p in sorted(summary["phases"].items(), key=lambda kv: -kv[1]["total_s"]):
+            extra = " ".join(f"{a}={p[a]}" for a in TOTALLED_ATTRS if a in p)
+            lines.append(
+                f"  {name:<16} n={p['count']:<4} total={p['total_s']:>8.2f}s "
+                f"p50={p['p50_s']:.2f}s p95={p['p95_s']:.2f}s {extra}".rstrip()
+            )
+        lines.append("  critical path: " + ", ".join(
+            f"{name} {c['total_s']:.2f}s ({c['count']}x)" for name, c in summary["critical_path"].items()
+        ))
+        return "\n".join(lines)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Times a block as a child of the current span. Yields a dict the block can add attributes to.
+    Without an active Trace this is a no-op.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield {}
+        return
+    record = {"id": next(trace._ids), "parent": _current_span.get(), "name": name, "job": trace.job_id}
+    record.update(attrs)
+    token = _current_span.set(record["id"])
+    record["start"] = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["duration"] = round(time.perf_counter() - t0, 6)
+        record["end"] = record["start"] + record["duration"]
+        _current_span.reset(token)
+        trace.emit(record)
@@ -1,6 +1,30 @@
 import os
+import shutil
 
 def load_persona(persona:str)->str:
     with open(f"personas/{persona}.md","r") as f:
         return f.read()
 
+def reset_workspace(root:str)->None:
+    """Recreates empty dev-space/ and qa-space/ folders under root"""
+    for space in ("dev-space", "qa-space"):
+        path = os.path.join(root, space)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+
+def format_workspace_summary(snapshot:dict, previous:dict)->str:
+    """Lists files with size/hash, marking what changed since the previous snapshot"""
+    lines = []
+    for path, (size, sha) in snapshot.items():
+        if path not in previous:
+            mark = "new"
+        elif previous[path] != (size, sha):
+            mark = "changed"
+        else:
+            mark = "unchanged"
+        lines.append(f"- {path} ({size} bytes, sha256 {sha}, {mark})")
+    for path in previous:
+        if path not in snapshot:
+            lines.append(f"- {path} (deleted)")
+    return "\n".join(lines) or "(no files)"
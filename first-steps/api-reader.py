@@ -1,87 +1,543 @@
 from mcp.server.fastmcp import FastMCP
+import asyncio
 import json
-import requests
+import os
+import random
+import tempfile
+import time
+import httpx
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
 from datetime import datetime as dt
 from datetime import date
 from typing import Optional
+from urllib.parse import urlencode
 import logging
 
+try:
+    import h2  # noqa: F401  (httpx only speaks HTTP/2 when the h2 package is installed)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+try:
+    from orjson import loads  # several times faster than json.loads on API payloads
+except ImportError:
+    from json import loads
+
+base_url = os.environ.get("API_BASE_URL", "https://jsonplaceholder.typicode.com")
+
+# Seconds to wait for a connection / for the whole response
+CONNECT_TIMEOUT = float(os.environ.get("API_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("API_TIMEOUT", 10))
+# Retries after the first attempt, for connection errors, timeouts and 429/5xx answers
+RETRIES = int(os.environ.get("API_RETRIES", 3))
+BACKOFF = float(os.environ.get("API_BACKOFF", 0.25))
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Requests in flight at once when fanning out
+FANOUT = int(os.environ.get("API_FANOUT", 10))
+# Response cache: seconds a response is served without asking the API, entries kept,
+# and an optional JSON file the cache is loaded from at start and saved to at shutdown
+CACHE_TTL = float(os.environ.get("API_CACHE_TTL", 300))
+CACHE_SIZE = int(os.environ.get("API_CACHE_SIZE", 256))
+CACHE_FILE = os.environ.get("API_CACHE_FILE")
+# Items per page when a listing doesn't ask for a limit
+PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", 10))
+
+_client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """The shared keep-alive client: one connection pool (HTTP/2 if available) for every tool call"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=HTTP2,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=FANOUT * 2, max_keepalive_connections=FANOUT),
+            headers={"Accept": "application/json"},
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@dataclass(slots=True)
+class Post:
+    id: int
+    userId: int
+    title: str
+    body: str
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Post":
+        return cls(data["id"], data["userId"], data["title"], data["body"])
+
+
+@dataclass(slots=True)
+class User:
+    id: int
+    name: str
+    username: str
+    email: str
+    address: Optional[dict] = None
+    phone: Optional[str] = None
+    website: Optional[str] = None
+    company: Optional[dict] = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "User":
+        return cls(data["id"], data["name"], data["username"], data["email"],
+                   data.get("address"), data.get("phone"), data.get("website"), data.get("company"))
+
+
+class ApiError(Exception):
+    """The API could not be reached (status None) or answered with an error status"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """LRU of parsed GET responses, served locally while younger than ttl.
+    Stale entries keep their ETag / Last-Modified, so refreshing them is a conditional
+    request that usually comes back as an empty 304. Concurrent misses for one path
+    share a single request, and a stale entry is served if the API can't be reached.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL, path: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # path -> {"data", "etag", "last_modified", "fetched_at"}
+        self.stats = {"hits": 0, "shared": 0, "revalidated": 0, "misses": 0, "stale": 0, "errors": 0}
+        self._inflight = {}
+        if path:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                self.entries.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def save(self):
+        """Writes the cache to self.path atomically"""
+        if not self.path:
+            return
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+    def _store(self, path, entry):
+        self.entries[path] = entry
+        self.entries.move_to_end(path)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def fresh(self, path: str):
+        """Cached body of path if it is still fresh (counted as a hit), else None"""
+        entry = self.entries.get(path)
+        if entry and time.time() - entry["fetched_at"] < self.ttl:
+            self.stats["hits"] += 1
+            self.entries.move_to_end(path)
+            return entry["data"]
+        return None
+
+    async def get(self, path: str):
+        """Parsed JSON body of GET path, from the cache when fresh"""
+        data = self.fresh(path)
+        if data is not None:
+            return data
+        entry = self.entries.get(path)
+        task = self._inflight.get(path)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(path, entry))
+            self._inflight[path] = task
+            task.add_done_callback(lambda done: self._finished(path, done))
+        else:
+            self.stats["shared"] += 1
+        # shielded: a caller that is cancelled (client gone, timeout) must not cancel the
+        # request for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def _finished(self, path, task):
+        self._inflight.pop(path, None)
+        if not task.cancelled():
+            task.exception()  # retrieved, so an error nobody waited for isn't logged as unhandled
+
+    async def _refresh(self, path, entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = await fetch(path, headers)
+            data = loads(response.content) if response.status_code == 200 else None
+        except (httpx.HTTPError, ValueError) as e:
+            error = ApiError(f"Encountered error while accessing API: {e!r}")
+        else:
+            if response.status_code == 304 and entry:
+                self.stats["revalidated"] += 1
+                self._store(path, dict(entry, fetched_at=time.time()))
+                return entry["data"]
+            if response.status_code == 200:
+                self.stats["misses"] += 1
+                self._store(path, {
+                    "data": data,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                })
+                return data
+            error = ApiError(f"Encountered error while accessing API: {response.status_code}",
+                             response.status_code)
+        if entry and error.status != 404:
+            self.stats["stale"] += 1
+            return entry["data"]
+        self.stats["errors"] += 1
+        raise error
+
+
+cache = ResponseCache(path=CACHE_FILE)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Closes the pooled connections and persists the response cache when the server shuts down"""
+    try:
+        yield
+    finally:
+        await close_client()
+        cache.save()
+
+
 # instantiate an MCP server client
-mcp = FastMCP("API Endpoint response retreiver")
+mcp = FastMCP("API Endpoint response retreiver", lifespan=lifespan)
 """An mcp server made with tools to support API interactions"""
 
-base_url="https://jsonplaceholder.typicode.com"
 
+async def fetch(path: str, headers: dict = None) -> httpx.Response:
+    """GET base_url + path on the shared client, retrying with exponential backoff and jitter.
+    Returns the last response (any status); raises the last transport error if none came back.
+    """
+    for attempt in range(RETRIES + 1):
+        try:
+            logging.info("GET " + path)
+            response = await get_client().get(path, headers=headers)
+            if response.status_code not in RETRY_STATUS or attempt == RETRIES:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else BACKOFF * 2 ** attempt
+        except httpx.TransportError:
+            if attempt == RETRIES:
+                raise
+            delay = BACKOFF * 2 ** attempt
+        await asyncio.sleep(min(delay, 10) * random.uniform(0.5, 1.0))
 
-def get_posts(postid: int=None)->str:
-    """ helper function to get Posts from jsonplaceholder """
-    if postid is None:
-        url = f"{base_url}/posts"
-    else:
-        url = f"{base_url}/posts/{postid}"
-    
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        return json.dumps(data, indent=4)
 
+async def fetch_many(paths: list[str]) -> list:
+    """Fetches several paths concurrently (at most FANOUT in flight), results in input order"""
+    limit = asyncio.Semaphore(FANOUT)
+
+    async def one(path):
+        async with limit:
+            return await fetch(path)
+
+    return await asyncio.gather(*(one(path) for path in paths), return_exceptions=True)
+
+
+async def iter_json_array(chunks):
+    """Yields the elements of a JSON array as its text arrives, without holding the whole document"""
+    decoder = json.JSONDecoder()
+    buffer, pos, started = "", 0, False
+    async for chunk in chunks:
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("expected a JSON array")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # the element continues in the next chunk
+            if not isinstance(item, (dict, list, str)) and (end == len(buffer) or buffer[end] not in ",] \t\r\n"):
+                break  # a number or literal may continue in the next chunk
+            yield item
+            pos = end
+    raise ValueError("JSON array ended early")
+
+
+def _matches(item, filters: dict) -> bool:
+    return all(str(item.get(key)) == str(value) for key, value in filters.items())
+
+
+def _pick(item, field: str):
+    """Value of a dotted field ("address.city") of a dict or Post/User, None if absent"""
+    for part in field.split("."):
+        item = item.get(part) if isinstance(item, dict) else getattr(item, part, None)
+    return item
+
+
+def project(data, fields: Optional[list[str]]):
+    """Keeps only fields (dotted for nested ones) of a record or list of records"""
+    if not fields:
+        return data
+    if isinstance(data, list):
+        return [project(item, fields) for item in data]
+    return {field: _pick(data, field) for field in fields}
+
+
+async def scan(path: str, filters: dict, offset: int, count: Optional[int]) -> list:
+    """Streams the collection at path and returns `count` matching items from `offset` on,
+    hanging up as soon as they are in instead of downloading and parsing the rest
+    """
+    found, skip = [], offset
+    try:
+        async with get_client().stream("GET", path) as response:
+            if response.status_code != 200:
+                raise ApiError(f"Encountered error while accessing API: {response.status_code}",
+                               response.status_code)
+            async for item in iter_json_array(response.aiter_text()):
+                if not _matches(item, filters):
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                found.append(item)
+                if count is not None and len(found) >= count:
+                    break
+    except (httpx.HTTPError, ValueError) as e:
+        raise ApiError(f"Encountered error while accessing API: {e!r}")
+    return found
+
+
+# Collections whose API ignored _start/_limit/filters; they are paged locally from then on
+_local_paging = set()
+
+
+async def list_items(resource: str, filters: dict = None, offset: int = 0, limit: Optional[int] = PAGE_SIZE):
+    """One page of a collection as (items, more), more telling whether items follow the page.
+    offset, limit and filters go upstream as _start, _limit and field=value (json-server style)
+    so only the page is transferred. If the API turns out to ignore them, the page is cut
+    locally: from the cached collection when fresh, otherwise by streaming it and stopping early.
+    """
+    filters = {key: value for key, value in (filters or {}).items() if value is not None}
+    path = f"/{resource}"
+    want = None if limit is None else limit + 1  # one extra tells whether more follow
+    collection = cache.fresh(path)
+    if collection is not None:
+        items = [item for item in collection if _matches(item, filters)][offset:]
+    elif resource in _local_paging:
+        items = await scan(path, filters, offset, want)
     else:
-        return f"Encountered error while accessing API: {response.status_code}"
+        query = dict(filters)
+        if offset:
+            query["_start"] = offset
+        if want is not None:
+            query["_limit"] = want
+        items = await cache.get(f"{path}?{urlencode(query)}" if query else path)
+        if not isinstance(items, list):
+            raise ApiError(f"Encountered error while accessing API: /{resource} is not a list")
+        if (want is not None and len(items) > want) or not all(_matches(item, filters) for item in items):
+            _local_paging.add(resource)
+            items = [item for item in items if _matches(item, filters)][offset:]
+    if want is None:
+        return items, False
+    return items[:limit], len(items) > limit
 
 
-def get_users(userId:Optional[int]=None)->str:
-    """ helper function to get Posts from jsonplaceholder """
-    
+def parse(model, data):
+    """model (Post or User) from a decoded record, or a list of them from a list"""
+    try:
+        if isinstance(data, list):
+            return [model.from_json(item) for item in data]
+        return model.from_json(data)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ApiError(f"Unexpected {model.__name__} data from API: {e!r}")
+
+
+async def get_posts(postid: int=None) -> Post | list[Post]:
+    """ helper function to get Posts from jsonplaceholder, raises ApiError """
+    if postid is None:
+        return parse(Post, await cache.get("/posts"))
+    return parse(Post, await cache.get(f"/posts/{postid}"))
+
+
+async def get_users(userId:Optional[int]=None) -> User | list[User]:
+    """ helper function to get Users from jsonplaceholder, raises ApiError """
     if userId is None:
-        url = f"{base_url}/users"
-    else:
-        url = f"{base_url}/users/{userId}"
-    logging.info("GET "+url)
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        return json.dumps(data, indent=4)
+        return parse(User, await cache.get("/users"))
+    return parse(User, await cache.get(f"/users/{userId}"))
 
-    else:
-        return f"Encountered error while accessing API: {response.status_code}"
+
+# resource -> (cached collection the index was built from, {id: record})
+_indexes = {}
+
+
+def _index(resource: str, collection: list) -> dict:
+    """{id: record} over a cached collection, rebuilt only when the cache holds a new copy"""
+    built = _indexes.get(resource)
+    if built is None or built[0] is not collection:
+        built = _indexes[resource] = (collection, {item["id"]: item for item in collection
+                                                   if isinstance(item, dict) and "id" in item})
+    return built[1]
+
+
+async def user_index() -> dict:
+    """{id: user record} from the cached /users collection, one request when it isn't cached"""
+    return _index("users", await cache.get("/users"))
+
+
+async def get_many(resource: str, model, ids: list[int]) -> tuple[dict, dict]:
+    """Records for ids as ({id: model}, {id: error message}). Each id is looked up once:
+    from the fresh cached collection if there is one, else through the per-record cache,
+    fetching the misses concurrently (at most FANOUT in flight).
+    """
+    wanted = list(dict.fromkeys(ids))
+    collection = cache.fresh(f"/{resource}")
+    index = _index(resource, collection) if isinstance(collection, list) else {}
+    limit = asyncio.Semaphore(FANOUT)
+
+    async def one(id):
+        if id in index:
+            return index[id]
+        async with limit:
+            return await cache.get(f"/{resource}/{id}")
+
+    found, errors = {}, {}
+    for id, result in zip(wanted, await asyncio.gather(*(one(id) for id in wanted), return_exceptions=True)):
+        try:
+            if isinstance(result, BaseException):
+                raise result
+            found[id] = parse(model, result)
+        except ApiError as e:
+            errors[id] = str(e)
+    return found, errors
+
+
+async def with_authors(posts: list[Post]) -> list[dict]:
+    """posts as dicts with the author's name added, joined locally on the cached user index"""
+    try:
+        users = await user_index()
+    except ApiError:
+        users = {}
+    return [dict(asdict(post), author=users.get(post.userId, {}).get("name", f"User {post.userId}"))
+            for post in posts]
 
 
 @mcp.tool()
-def show_posts(postid: Optional[int]=None):
+async def show_posts(postid: Optional[int]=None, userId: Optional[int]=None, limit: int=PAGE_SIZE,
+                     offset: int=0, fields: Optional[list[str]]=None):
     """ Function to get posts from the API
-    Args: postid - Optional post ID. If not provided, returns all posts
+    Args: postid - Optional post ID. If not provided, lists posts a page at a time
+          userId - Optional, only list posts by this user
+          limit, offset - Page size (0 for all posts) and posts to skip
+          fields - Optional, return only these fields of each post (e.g. ["id", "title"])
     """
-    raw_response = get_posts(postid)
     try:
-        data = json.loads(raw_response)
-        if isinstance(data, list):
-            result = f"Found {len(data)} posts:\n\n"
-            for post in data[:10]:
-                result += f"Post {post['id']} by User {post['userId']}: {post['title']}\n"
-            if len(data) > 10:
-                result += f"\n... and {len(data) - 10} more posts"
+        if postid is None:
+            posts, more = await list_items("posts", {"userId": userId}, offset, limit or None)
+            if fields:
+                return project(posts, fields)
+            result = f"Found {len(posts)} posts" + (f" from offset {offset}" if offset else "") + ":\n\n"
+            for post in parse(Post, posts):
+                result += f"Post {post.id} by User {post.userId}: {post.title}\n"
+            if more:
+                result += f"\n... more posts follow, use offset={offset + len(posts)}"
             return result
-        else:
-            return f"Posted by {data['userId']} on {date.today()}: {data['title']}\n{data['body']}"
-            
-    except Exception as e:
-        return f"Error processing API response: {raw_response}.  Details: {e}"
+
+        post = await get_posts(postid)
+    except ApiError as e:
+        return str(e)
+    if fields:
+        return project(post, fields)
+    return f"Posted by {post.userId} on {date.today()}: {post.title}\n{post.body}"
 
 @mcp.tool()
-def show_users(userId: Optional[int]=None):
-    """ Function to get raw response from API and parse it
+async def show_posts_many(ids: list[int], fields: Optional[list[str]]=None):
+    """ Function to get several posts in one call, each with its author's name
+    Args: ids - Post IDs; repeated IDs are fetched once
+          fields - Optional, return only these fields of each post (e.g. ["id", "title", "author"])
+    """
+    found, errors = await get_many("posts", Post, ids)
+    posts = await with_authors(list(found.values()))
+    if fields:
+        return {"posts": project(posts, fields), "errors": errors}
+    result = f"Found {len(posts)} of {len(found) + len(errors)} posts:\n\n"
+    for post in posts:
+        result += f"Post {post['id']} by {post['author']} (User {post['userId']}): {post['title']}\n{post['body']}\n\n"
+    for id, error in errors.items():
+        result += f"Post {id}: {error}\n"
+    return result
+
+@mcp.tool()
+async def show_users_many(ids: list[int], fields: Optional[list[str]]=None):
+    """ Function to get several users in one call
+    Args: ids - User IDs; repeated IDs are fetched once
+          fields - Optional, return only these fields, dotted for nested ones (e.g. ["name", "company.name"])
+    """
+    found, errors = await get_many("users", User, ids)
+    return {"users": project(list(found.values()), fields), "errors": errors}
+
+@mcp.tool()
+def cache_stats():
+    """ Hit/miss counters and size of the API response cache
     Args: None
     """
-    raw_response=get_users(userId)
+    stats = cache.stats
+    lookups = sum(stats.values())
+    local = stats["hits"] + stats["shared"] + stats["revalidated"]
+    return dict(
+        stats,
+        entries=len(cache.entries),
+        max_entries=cache.maxsize,
+        ttl_seconds=cache.ttl,
+        hit_rate=round(local / lookups, 3) if lookups else None,
+    )
+
+@mcp.tool()
+async def show_users(userId: Optional[int]=None, limit: Optional[int]=None, offset: int=0,
+                     fields: Optional[list[str]]=None):
+    """ Function to get raw response from API and parse it
+    Args: userId - Optional user ID. If not provided, returns all users
+          limit, offset - Optional page size and users to skip; the page comes back with next_offset
+          fields - Optional, return only these fields, dotted for nested ones (e.g. ["name", "address.city"])
+    """
     try:
-        data = json.loads(raw_response)
-        return data
-    except Exception as e:
-        return f"Error processing API response: {raw_response}.  Details: {e}"
+        if userId is None and (limit or offset):
+            users, more = await list_items("users", None, offset, limit or None)
+            users = project(users, fields) if fields else parse(User, users)
+            return {"users": users, "next_offset": offset + len(users) if more else None}
+
+        users = await get_users(userId)
+    except ApiError as e:
+        return str(e)
+    return project(users, fields)
 
 
 
 
 # execute and return the stdio output
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
\ No newline at end of file
+    mcp.run(transport="stdio")
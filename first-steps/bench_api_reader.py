@@ -0,0 +1,246 @@
+"""Benchmarks api-reader.py against a local stand-in for jsonplaceholder.
+
+The stand-in serves /posts, /posts/<id>, /users and /users/<id> with
+generated data over keep-alive HTTP/1.1. Each new connection costs
+--handshake-ms, standing in for the DNS + TCP + TLS setup of the real API,
+and each request costs --latency-ms. Compared:
+
+- requests.get per call (no session), as api-reader.py used to do
+- the pooled httpx client, one call after another
+- the pooled client fanning out all calls at once (fetch_many)
+- the same lookups repeated through the response cache: fresh hits, then
+  revalidation (ETag -> 304) once the entries have gone stale
+- first pages of a --posts sized listing: downloading the whole collection
+  and slicing it (as show_posts used to), _start/_limit pushed down, and a
+  stand-in that ignores those params so list_items streams and stops early
+- CPU cost per call of turning a response into show_posts output, no
+  network: the old response.json() -> json.dumps(indent=4) -> json.loads
+  round trip against one decode into Post objects (orjson when installed)
+
+    python bench_api_reader.py --calls 50 --latency-ms 20 --handshake-ms 60
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+import timeit
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_data(posts=100, users=10):
+    users_data = [{"id": i, "name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com"}
+                  for i in range(1, users + 1)]
+    posts_data = [{"userId": (i - 1) // (posts // users) + 1, "id": i, "title": f"post title {i}",
+                   "body": f"body of post {i} " * 5} for i in range(1, posts + 1)]
+    return {"posts": posts_data, "users": users_data}
+
+
+def stand_in_server(latency, handshake, posts=100, pushdown=True):
+    """Starts the fake API on a free local port; returns (server, base_url).
+    With pushdown, listings honour json-server's _start, _limit and field=value params
+    """
+    data = make_data(posts)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        # Headers and body in one send; otherwise Nagle + delayed ACK add ~40ms per kept-alive request
+        disable_nagle_algorithm = True
+        wbufsize = -1
+
+        def setup(self):
+            time.sleep(handshake)  # once per connection
+            super().setup()
+
+        def do_GET(self):
+            time.sleep(latency)
+            path, _, query = self.path.partition("?")
+            match = re.fullmatch(r"/(posts|users)(?:/(\d+))?", path)
+            status, body = 404, {}
+            if match:
+                items = data[match[1]]
+                if match[2] is None:
+                    if pushdown:
+                        params = dict(parse_qsl(query))
+                        start = int(params.pop("_start", 0))
+                        limit = params.pop("_limit", None)
+                        items = [item for item in items
+                                 if all(str(item.get(k)) == v for k, v in params.items())][start:]
+                        items = items if limit is None else items[:int(limit)]
+                    status, body = 200, items
+                elif 1 <= int(match[2]) <= len(items):
+                    status, body = 200, items[int(match[2]) - 1]
+            payload = json.dumps(body).encode()
+            etag = '"%s"' % hashlib.md5(payload).hexdigest()
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                status, payload = 304, b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128  # the default backlog of 5 drops SYNs during a fan-out burst
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def load_api_reader(url):
+    os.environ["API_BASE_URL"] = url
+    spec = importlib.util.spec_from_file_location("api_reader", os.path.join(HERE, "api-reader.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def report(name, wall, latencies):
+    line = f"  {name:<28} total={wall * 1000:8.1f}ms"
+    if latencies:
+        line += f"  per call p50={statistics.median(latencies) * 1000:8.3f}ms max={max(latencies) * 1000:8.3f}ms"
+    print(line)
+
+
+async def bench_async(api, paths):
+    latencies = []
+    t0 = time.perf_counter()
+    for path in paths:
+        t = time.perf_counter()
+        (await api.fetch(path)).json()
+        latencies.append(time.perf_counter() - t)
+    report("httpx pooled, sequential", time.perf_counter() - t0, latencies)
+
+    t0 = time.perf_counter()
+    responses = await api.fetch_many(paths)
+    assert all(r.status_code == 200 for r in responses)
+    report(f"httpx pooled, fan-out {api.FANOUT}", time.perf_counter() - t0, [])
+
+    for name in ("cache, cold", "cache, fresh hits"):
+        latencies = []
+        t0 = time.perf_counter()
+        for path in paths:
+            t = time.perf_counter()
+            await api.cache.get(path)
+            latencies.append(time.perf_counter() - t)
+        report(name, time.perf_counter() - t0, latencies)
+
+    api.cache.ttl = 0  # every entry is now stale and goes back with its ETag
+    latencies = []
+    t0 = time.perf_counter()
+    for path in paths:
+        t = time.perf_counter()
+        await api.cache.get(path)
+        latencies.append(time.perf_counter() - t)
+    report("cache, stale -> 304", time.perf_counter() - t0, latencies)
+    print(f"  cache stats: {api.cache.stats}")
+    await api.close_client()
+
+
+async def bench_listing(api, pages, label, limit=10):
+    """First `pages` pages of /posts, each read cold: whole list sliced locally, then list_items"""
+    if label == "pushed down":
+        latencies = []
+        t0 = time.perf_counter()
+        for page in range(pages):
+            t = time.perf_counter()
+            (await api.fetch("/posts")).json()[page * limit:(page + 1) * limit]
+            latencies.append(time.perf_counter() - t)
+        report("whole list, sliced locally", time.perf_counter() - t0, latencies)
+
+    latencies = []
+    t0 = time.perf_counter()
+    for page in range(pages):
+        api.cache.entries.clear()
+        t = time.perf_counter()
+        items, _ = await api.list_items("posts", None, page * limit, limit)
+        assert [p["id"] for p in items] == list(range(page * limit + 1, (page + 1) * limit + 1))
+        latencies.append(time.perf_counter() - t)
+    report(f"list_items, {label}", time.perf_counter() - t0, latencies)
+    await api.close_client()
+
+
+def bench_parse(api, number=2000):
+    posts = make_data()["posts"]
+
+    def old(response):
+        data = json.loads(json.dumps(response.json(), indent=4))
+        if isinstance(data, list):
+            return "".join(f"Post {p['id']} by User {p['userId']}: {p['title']}\n" for p in data[:10])
+        return f"Posted by {data['userId']} on {date.today()}: {data['title']}\n{data['body']}"
+
+    def new(response):
+        data = api.parse(api.Post, api.loads(response.content))
+        if isinstance(data, list):
+            return "".join(f"Post {p.id} by User {p.userId}: {p.title}\n" for p in data[:10])
+        return f"Posted by {data.userId} on {date.today()}: {data.title}\n{data.body}"
+
+    print(f"parse + format per call, json decoder: {api.loads.__module__}")
+    for name, body in (("one post", posts[0]), (f"{len(posts)} posts", posts)):
+        payload = json.dumps(body).encode()
+        assert old(api.httpx.Response(200, content=payload)) == new(api.httpx.Response(200, content=payload))
+        for label, fn in (("before", old), ("after", new)):
+            # a fresh Response each time, so httpx's cached .json()/.text don't skew the old path
+            responses = [api.httpx.Response(200, content=payload) for _ in range(number)]
+            it = iter(responses)
+            seconds = timeit.timeit(lambda: fn(next(it)), number=number)
+            print(f"  {name:<12} {label:<7} {seconds / number * 1e6:8.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark api-reader.py against a local fake API")
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20, help="server time per request")
+    parser.add_argument("--handshake-ms", type=float, default=60, help="extra cost of each new connection")
+    parser.add_argument("--posts", type=int, default=5000, help="posts in the listing benchmark's collection")
+    parser.add_argument("--pages", type=int, default=5, help="pages read in the listing benchmark")
+    args = parser.parse_args()
+
+    server, url = stand_in_server(args.latency_ms / 1000, args.handshake_ms / 1000)
+    api = load_api_reader(url)
+    logging.getLogger().setLevel(logging.WARNING)  # FastMCP enables per-request INFO logs
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    paths = [f"/posts/{i % 100 + 1}" if i % 2 else f"/users/{i % 10 + 1}" for i in range(args.calls)]
+    print(f"{args.calls} GETs, {args.latency_ms}ms per request, {args.handshake_ms}ms per new connection, "
+          f"HTTP/2 {'on' if api.HTTP2 else 'off (h2 not installed)'}")
+
+    latencies = []
+    t0 = time.perf_counter()
+    for path in paths:
+        t = time.perf_counter()
+        requests.get(url + path).json()
+        latencies.append(time.perf_counter() - t)
+    report("requests.get, no session", time.perf_counter() - t0, latencies)
+
+    asyncio.run(bench_async(api, paths))
+    server.shutdown()
+
+    print(f"first {args.pages} pages of 10 from {args.posts} posts")
+    for label, pushdown in (("pushed down", True), ("streamed scan", False)):
+        server, url = stand_in_server(args.latency_ms / 1000, args.handshake_ms / 1000, args.posts, pushdown)
+        asyncio.run(bench_listing(load_api_reader(url), args.pages, label))
+        server.shutdown()
+
+    bench_parse(api)
+
+
+if __name__ == "__main__":
+    main()